@@ -1,17 +1,917 @@
+import argparse
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 import tkinter as tk
 from tkinter import Menu
 
+import numpy as np
+
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 600
+VIEWPORT = (0, 0, CANVAS_WIDTH - 1, CANVAS_HEIGHT - 1)
+
+LINE_MODES = ("CDA", "Bresenham", "RunSlice", "Wu", "WuBlend")
+
+# Запас отсечения в пикселях: пиксели всех алгоритмов лежат ближе 2 пикселей к идеальной прямой
+CLIP_MARGIN = 2
+
+
+def clip_segments(segments, rect=VIEWPORT, margin=CLIP_MARGIN):
+    """Отсечение сразу N отрезков прямоугольником по алгоритму Лианга — Барски.
+
+    segments — массив (N, 4), rect — (xmin, ymin, xmax, ymax), расширяемый на margin.
+    Возвращает маску отрезков, задевающих прямоугольник, и параметры t0 <= t1
+    видимой части. Концы не пересчитываются, поэтому наклон отрезка не меняется.
+    """
+    seg = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    xmin, ymin, xmax, ymax = rect
+    p = np.stack((x1 - x2, x2 - x1, y1 - y2, y2 - y1))
+    q = np.stack((x1 - (xmin - margin), (xmax + margin) - x1, y1 - (ymin - margin), (ymax + margin) - y1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = q / p
+    t0 = np.max(np.where(p < 0, r, 0), axis=0)
+    t1 = np.min(np.where(p > 0, r, 1), axis=0)
+    visible = ~np.any((p == 0) & (q < 0), axis=0) & (t0 <= t1)
+    return visible, t0, t1
+
+
+def clip_steps(x1, y1, x2, y2, rect):
+    """Диапазон шагов first..last по основной оси, на которых отрезок может попасть в rect.
+
+    Шаг i соответствует параметру t = i / steps. Возвращает None, если отрезок
+    целиком снаружи; без прямоугольника возвращает весь отрезок.
+    """
+    steps = max(abs(x2 - x1), abs(y2 - y1))
+    if rect is None:
+        return 0, steps
+    visible, t0, t1 = clip_segments((x1, y1, x2, y2), rect)
+    if not visible[0]:
+        return None
+    return max(0, math.floor(t0[0] * steps)), min(steps, math.ceil(t1[0] * steps))
+
+
+def cda_pixels(x1, y1, x2, y2, rect=None):
+    """Пиксели отрезка по алгоритму ЦДА в виде списка (x, y), с отсечением по rect."""
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = max(abs(dx), abs(dy))
+    span = clip_steps(x1, y1, x2, y2, rect)
+    if span is None:
+        return []
+    if steps == 0:
+        return [(round(x1), round(y1))]
+    first, last = span
+    x_inc = dx / steps
+    y_inc = dy / steps
+    pixels = []
+    # Координаты шага считаются от начала отрезка, поэтому невидимые шаги не проходятся
+    for step in range(first, last + 1):
+        pixels.append((round(x1 + step * x_inc), round(y1 + step * y_inc)))
+    return pixels
+
+
+def cda_batch(segments, rect=None):
+    """Пиксели сразу N отрезков по алгоритму ЦДА за один проход NumPy.
+
+    segments — массив (N, 4) из строк x1, y1, x2, y2. Возвращает массивы xs, ys
+    всех пикселей и offsets длины N + 1: пиксели отрезка i лежат в
+    xs[offsets[i]:offsets[i + 1]]. Координаты шагов вычисляются от начала отрезка
+    так же, как в cda_pixels, поэтому результат совпадает попиксельно.
+    Отрезки вне rect дают пустые диапазоны.
+    """
+    seg = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    first = np.zeros(len(seg), dtype=np.int64)
+    last = steps.copy()
+    if rect is not None and len(seg):
+        visible, t0, t1 = clip_segments(seg, rect)
+        first = np.maximum(0, np.floor(t0 * steps)).astype(np.int64)
+        last = np.minimum(steps, np.ceil(t1 * steps)).astype(np.int64)
+        last[~visible] = first[~visible] - 1
+    counts = last - first + 1
+    offsets = np.zeros(len(seg) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    if offsets[-1] == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, offsets
+    div = np.maximum(steps, 1)
+    width = int(counts.max())
+    mask = np.arange(width) < counts[:, None]
+
+    step = first[:, None] + np.arange(width)
+
+    def step_rows(start, delta):
+        values = start[:, None] + step * (delta / div)[:, None]
+        return np.rint(values[mask]).astype(np.int64)
+
+    return step_rows(x1, dx), step_rows(y1, dy), offsets
+
+
+def bresenham_state(dx, dy, step):
+    """Число шагов по неосновной оси и ошибка алгоритма Брезенхема на шаге step основной оси."""
+    major, minor = max(dx, dy), min(dx, dy)
+    minor_steps = max(0, -((major - 2 * minor * step) // (2 * major))) if major else 0
+    if dx >= dy:
+        return minor_steps, dx - dy - step * dy + minor_steps * dx
+    return minor_steps, dx - dy - minor_steps * dy + step * dx
+
+
+def bresenham_pixels(x1, y1, x2, y2, rect=None):
+    """Пиксели отрезка по алгоритму Брезенхема в виде списка (x, y), с отсечением по rect."""
+    span = clip_steps(x1, y1, x2, y2, rect)
+    if span is None:
+        return []
+    first, last = span
+    dx = abs(x2 - x1)
+    dy = abs(y2 - y1)
+    sx = 1 if x1 < x2 else -1
+    sy = 1 if y1 < y2 else -1
+    minor_steps, err = bresenham_state(dx, dy, first)
+    if dx >= dy:
+        x, y = x1 + sx * first, y1 + sy * minor_steps
+    else:
+        x, y = x1 + sx * minor_steps, y1 + sy * first
+    pixels = []
+    for _ in range(last - first + 1):
+        pixels.append((x, y))
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            x += sx
+        if e2 < dx:
+            err += dx
+            y += sy
+    return pixels
+
+
+def bresenham_runs(x1, y1, x2, y2, rect=None):
+    """Серии пикселей отрезка по алгоритму Брезенхема со срезами (run-slice).
+
+    Вместо решения на каждый пиксель принимается одно целочисленное решение на
+    серию: длины серий вдоль основной оси чередуются между q и q + 1. Возвращает
+    список горизонтальных или вертикальных отрезков (xa, ya, xb, yb) с xa <= xb,
+    ya <= yb; их объединение совпадает с пикселями bresenham_pixels.
+    """
+    span = clip_steps(x1, y1, x2, y2, rect)
+    if span is None:
+        return []
+    first, last = span
+    dx = abs(x2 - x1)
+    dy = abs(y2 - y1)
+    sx = 1 if x1 < x2 else -1
+    sy = 1 if y1 < y2 else -1
+    x_major = dx >= dy
+    if x_major:
+        major, minor = dx, dy
+    else:
+        major, minor = dy, dx
+    if minor == 0:
+        xa, ya = x1 + sx * first, y1 + sy * first
+        xb, yb = x1 + sx * last, y1 + sy * last
+        if x_major:
+            return [(min(xa, xb), y1, max(xa, xb), y1)]
+        return [(x1, min(ya, yb), x1, max(ya, yb))]
+
+    # Серия r заканчивается на шаге floor((2r + 1) * major / (2 * minor)).
+    denom = 2 * minor
+    whole, frac = divmod(2 * major, denom)
+    first_run, _ = bresenham_state(dx, dy, first)
+    last_run, _ = bresenham_state(dx, dy, last)
+    end, rem = divmod((2 * first_run + 1) * major, denom)
+    start = first
+    runs = []
+    for r in range(first_run, last_run + 1):
+        if r == minor:
+            end = major
+        stop = min(end, last)
+        if x_major:
+            xa, xb = x1 + sx * start, x1 + sx * stop
+            y = y1 + sy * r
+            runs.append((min(xa, xb), y, max(xa, xb), y))
+        else:
+            ya, yb = y1 + sy * start, y1 + sy * stop
+            x = x1 + sx * r
+            runs.append((x, min(ya, yb), x, max(ya, yb)))
+        start = end + 1
+        end += whole
+        rem += frac
+        if rem >= denom:
+            end += 1
+            rem -= denom
+    return runs
+
+
+def wu_major_range(x1, y1, x2, y2, rect):
+    """Диапазон координат основной оси, на котором пиксели алгоритма Ву могут попасть в rect."""
+    steep = abs(y2 - y1) > abs(x2 - x1)
+    start, stop = (y1, y2) if steep else (x1, x2)
+    if rect is None:
+        return min(start, stop), max(start, stop)
+    visible, t0, t1 = clip_segments((x1, y1, x2, y2), rect)
+    if not visible[0]:
+        return None
+    a = start + (stop - start) * t0[0]
+    b = start + (stop - start) * t1[0]
+    return math.floor(min(a, b)), math.ceil(max(a, b))
+
+
+def wu_pixels(x1, y1, x2, y2, rect=None):
+    """Пиксели отрезка по алгоритму Ву в виде списка (x, y, интенсивность), с отсечением по rect."""
+    pixels = []
+    major_range = wu_major_range(x1, y1, x2, y2, rect)
+    if major_range is None:
+        return pixels
+    lo, hi = major_range
+
+    def plot(x, y, c):
+        pixels.append((x, y, c))
+
+    def fpart(x):
+        return x - int(x)
+
+    def rfpart(x):
+        return 1 - fpart(x)
+
+    steep = abs(y2 - y1) > abs(x2 - x1)
+    if steep:
+        x1, y1 = y1, x1
+        x2, y2 = y2, x2
+    if x1 > x2:
+        x1, x2 = x2, x1
+        y1, y2 = y2, y1
+    dx = x2 - x1
+    dy = y2 - y1
+    if dx == 0:
+        gradient = 1
+    else:
+        gradient = dy / dx
+    x_end = round(x1)
+    y_end = y1 + gradient * (x_end - x1)
+    x_gap = rfpart(x1 + 0.5)
+    xpxl1 = x_end
+    ypxl1 = int(y_end)
+    if lo <= xpxl1 <= hi:
+        if steep:
+            plot(ypxl1, xpxl1, rfpart(y_end) * x_gap)
+            plot(ypxl1 + 1, xpxl1, fpart(y_end) * x_gap)
+        else:
+            plot(xpxl1, ypxl1, rfpart(y_end) * x_gap)
+            plot(xpxl1, ypxl1 + 1, fpart(y_end) * x_gap)
+    first = max(xpxl1 + 1, lo)
+    y_start = y_end
+    x_end = round(x2)
+    y_end = y2 + gradient * (x_end - x2)
+    x_gap = fpart(x2 + 0.5)
+    xpxl2 = x_end
+    ypxl2 = int(y_end)
+    if lo <= xpxl2 <= hi:
+        if steep:
+            plot(ypxl2, xpxl2, rfpart(y_end) * x_gap)
+            plot(ypxl2 + 1, xpxl2, fpart(y_end) * x_gap)
+        else:
+            plot(xpxl2, ypxl2, rfpart(y_end) * x_gap)
+            plot(xpxl2, ypxl2 + 1, fpart(y_end) * x_gap)
+    for x in range(first, min(xpxl2, hi + 1)):
+        # Пересечение считается от первого конца, поэтому невидимые столбцы не проходятся
+        intery = y_start + gradient * (x - xpxl1)
+        if steep:
+            plot(int(intery), x, rfpart(intery))
+            plot(int(intery) + 1, x, fpart(intery))
+        else:
+            plot(x, int(intery), rfpart(intery))
+            plot(x, int(intery) + 1, fpart(intery))
+    return pixels
+
+
+def wu_coverage(x1, y1, x2, y2, rect=None):
+    """Векторизованный алгоритм Ву: массивы xs, ys и покрытие пикселей в [0, 1].
+
+    Пиксели и значения покрытия совпадают с wu_pixels, но вычисляются без
+    цикла по пикселям.
+    """
+    major_range = wu_major_range(x1, y1, x2, y2, rect)
+    if major_range is None:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float64)
+    lo, hi = major_range
+
+    steep = abs(y2 - y1) > abs(x2 - x1)
+    if steep:
+        x1, y1 = y1, x1
+        x2, y2 = y2, x2
+    if x1 > x2:
+        x1, x2 = x2, x1
+        y1, y2 = y2, y1
+    dx = x2 - x1
+    dy = y2 - y1
+    if dx == 0:
+        gradient = 1
+    else:
+        gradient = dy / dx
+
+    x_end1 = round(x1)
+    y_end1 = y1 + gradient * (x_end1 - x1)
+    x_gap1 = 1 - (x1 + 0.5 - int(x1 + 0.5))
+    x_end2 = round(x2)
+    y_end2 = y2 + gradient * (x_end2 - x2)
+    x_gap2 = x2 + 0.5 - int(x2 + 0.5)
+
+    first = max(x_end1 + 1, lo)
+    count = max(min(x_end2, hi + 1) - first, 0)
+    intery = y_end1 + gradient * np.arange(first - x_end1, first - x_end1 + count, dtype=np.float64)
+
+    ends = [(x_end, y_end, x_gap) for x_end, y_end, x_gap in
+            ((x_end1, y_end1, x_gap1), (x_end2, y_end2, x_gap2)) if lo <= x_end <= hi]
+    major = np.concatenate(([e[0] for e in ends], np.arange(first, first + count))).astype(np.int64)
+    minor_f = np.concatenate(([e[1] for e in ends], intery))
+    minor = np.trunc(minor_f)
+    frac = minor_f - minor
+    gap = np.ones_like(minor_f)
+    gap[:len(ends)] = [e[2] for e in ends]
+
+    major = np.repeat(major, 2)
+    minor = np.repeat(minor.astype(np.int64), 2)
+    minor[1::2] += 1
+    coverage = np.empty(2 * len(frac), dtype=np.float64)
+    coverage[0::2] = (1 - frac) * gap
+    coverage[1::2] = frac * gap
+    if steep:
+        return minor, major, coverage
+    return major, minor, coverage
+
+
+def intensity_to_gray(intensity):
+    """Перевод интенсивности [0, 1] в уровень серого [0, 255]."""
+    return max(0, min(255, int(255 * intensity)))
+
+
+# Таблицы на 256 уровней: цвет canvas для уровня серого и вес смешивания для уровня покрытия
+GRAY_LUT = [f"#{g:02x}{g:02x}{g:02x}" for g in range(256)]
+ALPHA_LUT = np.arange(256, dtype=np.float32) / 255
+
+
+class CanvasBackend:
+    """Вывод растра на canvas: отдельный элемент на каждый пиксель."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.items_created = 0
+        self.layer_count = 0
+        self.tags = "pixel"
+
+    def draw_pixels(self, pixels, color="black"):
+        for x, y in pixels:
+            self.canvas.create_line(x, y, x + 1, y + 1, fill=color, tags=self.tags)
+        self.items_created += len(pixels)
+
+    def draw_spans(self, spans, color="black"):
+        for xa, ya, xb, yb in spans:
+            if ya == yb:
+                self.canvas.create_line(xa, ya, xb + 1, ya, fill=color, tags=self.tags)
+            else:
+                self.canvas.create_line(xa, ya, xa, yb + 1, fill=color, tags=self.tags)
+        self.items_created += len(spans)
+
+    def draw_pixels_intensity(self, pixels):
+        for x, y, c in pixels:
+            self.canvas.create_line(x, y, x + 1, y + 1, fill=GRAY_LUT[intensity_to_gray(c)], tags=self.tags)
+        self.items_created += len(pixels)
+
+    def draw_coverage(self, xs, ys, coverage):
+        # Элементы canvas не смешиваются между собой, поэтому черный цвет смешивается только с белым фоном
+        levels = np.clip(np.rint(255 * (1 - coverage)), 0, 255).astype(np.int64)
+        for x, y, level in zip(xs.tolist(), ys.tolist(), levels.tolist()):
+            self.canvas.create_line(x, y, x + 1, y + 1, fill=GRAY_LUT[level], tags=self.tags)
+        self.items_created += len(levels)
+
+    def begin_layer(self):
+        self.layer_count += 1
+        self.tags = ("pixel", f"layer{self.layer_count}")
+
+    def end_layer(self):
+        layer = self.tags[1]
+        self.tags = "pixel"
+        return layer
+
+    def hide_layer(self, layer):
+        self.canvas.itemconfigure(layer, state=tk.HIDDEN)
+
+    def show_layer(self, layer):
+        self.canvas.itemconfigure(layer, state=tk.NORMAL)
+
+    def clear(self):
+        self.canvas.delete("pixel")
+
+    def present(self):
+        pass
+
+    def destroy(self):
+        self.clear()
+
+
+class Framebuffer:
+    """RGB-буфер NumPy, в который пишут алгоритмы растеризации; не зависит от Tk.
+
+    origin — координаты левого верхнего пикселя буфера, поэтому буфер может
+    хранить и отдельную плитку экрана.
+    """
+
+    def __init__(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, background=(255, 255, 255), origin=(0, 0)):
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self.background = np.array(background, dtype=np.uint8)
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self.buffer[:] = self.background
+        self.coverage = np.zeros((height, width), dtype=np.float32)
+        self.layer_parts = None
+
+    def _index(self, xs, ys):
+        """Плоские индексы пикселей в буфере и маска пикселей, попавших в буфер."""
+        xs = xs - self.origin[0]
+        ys = ys - self.origin[1]
+        mask = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        return ys * self.width + xs, mask
+
+    def _store(self, flat, values):
+        """Запись пикселей по плоским индексам с запоминанием прежних значений для текущего слоя."""
+        pixels = self.buffer.reshape(-1, 3)
+        if self.layer_parts is not None:
+            self.layer_parts.append((flat, pixels[flat]))
+        pixels[flat] = values
+
+    def draw_pixels(self, pixels, color=(0, 0, 0)):
+        if len(pixels) == 0:
+            return
+        xy = np.asarray(pixels, dtype=np.int64)
+        flat, mask = self._index(xy[:, 0], xy[:, 1])
+        self._store(flat[mask], color)
+
+    def draw_spans(self, spans, color=(0, 0, 0)):
+        if len(spans) == 0:
+            return
+        xa, ya, xb, yb = np.asarray(spans, dtype=np.int64).T
+        lengths = (xb - xa) + (yb - ya) + 1
+        owner = np.repeat(np.arange(len(lengths)), lengths)
+        offsets = np.arange(int(lengths.sum())) - (np.cumsum(lengths) - lengths)[owner]
+        horizontal = (ya == yb)[owner]
+        xs = xa[owner] + np.where(horizontal, offsets, 0)
+        ys = ya[owner] + np.where(horizontal, 0, offsets)
+        flat, mask = self._index(xs, ys)
+        self._store(flat[mask], color)
+
+    def draw_pixels_intensity(self, pixels):
+        if len(pixels) == 0:
+            return
+        data = np.asarray(pixels, dtype=np.float64)
+        gray = np.clip((255 * data[:, 2]).astype(np.int64), 0, 255).astype(np.uint8)
+        flat, mask = self._index(data[:, 0].astype(np.int64), data[:, 1].astype(np.int64))
+        self._store(flat[mask], gray[mask, None])
+
+    def draw_coverage(self, xs, ys, coverage, color=(0, 0, 0)):
+        flat, mask = self._index(xs, ys)
+        flat = flat[mask]
+        if len(flat) == 0:
+            return
+        coverage_flat = self.coverage.reshape(-1)
+        np.add.at(coverage_flat, flat, coverage[mask].astype(np.float32))
+        touched = np.unique(flat)
+        levels = np.rint(np.clip(coverage_flat[touched], 0, 1) * 255).astype(np.uint8)
+        coverage_flat[touched] = 0
+        alpha = ALPHA_LUT[levels][:, None]
+        pixels = self.buffer.reshape(-1, 3)
+        dst = pixels[touched].astype(np.float32)
+        ink = np.asarray(color, dtype=np.float32)
+        self._store(touched, np.rint(dst + (ink - dst) * alpha).astype(np.uint8))
+
+    def begin_layer(self):
+        self.layer_parts = []
+
+    def end_layer(self):
+        """Слой отрезка: индексы пикселей (int32) и их значения до и после рисования (uint8)."""
+        parts, self.layer_parts = self.layer_parts, None
+        if not parts:
+            empty = np.empty((0, 3), dtype=np.uint8)
+            return np.empty(0, dtype=np.int32), empty, empty
+        flat = np.concatenate([part[0] for part in parts])
+        before = np.concatenate([part[1] for part in parts])
+        # При повторной записи в пиксель внутри слоя прежним считается значение до первой записи
+        flat, first = np.unique(flat, return_index=True)
+        after = self.buffer.reshape(-1, 3)[flat]
+        return flat.astype(np.int32), before[first], after
+
+    def hide_layer(self, layer):
+        # Слои снимаются в порядке, обратном рисованию, поэтому под слоем лежат сохраненные значения
+        flat, before, _ = layer
+        self.buffer.reshape(-1, 3)[flat] = before
+
+    def show_layer(self, layer):
+        flat, _, after = layer
+        self.buffer.reshape(-1, 3)[flat] = after
+
+    def clear(self):
+        self.buffer[:] = self.background
+
+    def to_ppm(self):
+        return to_ppm(self.buffer)
+
+
+class FramebufferBackend(Framebuffer):
+    """Вывод растра через RGB-буфер NumPy, который передается на canvas одним PhotoImage за кадр."""
+
+    def __init__(self, canvas, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, background=(255, 255, 255)):
+        super().__init__(width, height, background)
+        self.canvas = canvas
+        self.items_created = 0
+        self.photo = tk.PhotoImage(width=width, height=height)
+        self.image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        self.canvas.tag_lower(self.image_item)
+        self.items_created += 1
+        self.present()
+
+    def present(self):
+        self.photo.configure(data=self.to_ppm(), format="PPM")
+
+    def destroy(self):
+        self.canvas.delete(self.image_item)
+
+
+def rasterize_line(target, x1, y1, x2, y2, mode, rect=None):
+    """Растеризация отрезка алгоритмом mode в target (Framebuffer или CanvasBackend) с отсечением по rect.
+
+    Возвращает число построенных пикселей.
+    """
+    if mode == "CDA":
+        pixels = cda_pixels(x1, y1, x2, y2, rect)
+        target.draw_pixels(pixels)
+    elif mode == "Bresenham":
+        pixels = bresenham_pixels(x1, y1, x2, y2, rect)
+        target.draw_pixels(pixels)
+    elif mode == "RunSlice":
+        spans = bresenham_runs(x1, y1, x2, y2, rect)
+        target.draw_spans(spans)
+        return sum((xb - xa + 1) * (yb - ya + 1) for xa, ya, xb, yb in spans)
+    elif mode == "Wu":
+        pixels = wu_pixels(x1, y1, x2, y2, rect)
+        target.draw_pixels_intensity(pixels)
+    elif mode == "WuBlend":
+        xs, ys, coverage = wu_coverage(x1, y1, x2, y2, rect)
+        target.draw_coverage(xs, ys, coverage)
+        return len(xs)
+    else:
+        raise ValueError(f"Неизвестный алгоритм: {mode}")
+    return len(pixels)
+
+
+def rasterize_serial(segments, modes, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+    """Последовательная растеризация отрезков в один буфер (эталон для rasterize_tiled)."""
+    framebuffer = Framebuffer(width, height)
+    for (x1, y1, x2, y2), mode in zip(np.asarray(segments).reshape(-1, 4).tolist(), modes):
+        rasterize_line(framebuffer, x1, y1, x2, y2, mode, (0, 0, width - 1, height - 1))
+    return framebuffer.buffer
+
+
+def tile_rects(width, height, tile_size):
+    """Прямоугольники плиток (xmin, ymin, xmax, ymax), покрывающие экран width x height."""
+    return [(x, y, min(x + tile_size, width) - 1, min(y + tile_size, height) - 1)
+            for y in range(0, height, tile_size) for x in range(0, width, tile_size)]
+
+
+def _rasterize_tile(task):
+    """Растеризация отрезков одной плитки в процессе пула; возвращает плитку и время работы."""
+    rect, segments, modes = task
+    started = time.perf_counter()
+    xmin, ymin, xmax, ymax = rect
+    tile = Framebuffer(xmax - xmin + 1, ymax - ymin + 1, origin=(xmin, ymin))
+    for (x1, y1, x2, y2), mode in zip(segments.tolist(), modes):
+        rasterize_line(tile, x1, y1, x2, y2, mode, rect)
+    return rect, tile.buffer, len(modes), time.perf_counter() - started
+
+
+def rasterize_tiled(segments, modes, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, tile_size=200, workers=None):
+    """Растеризация отрезков по плиткам экрана в пуле процессов.
+
+    Отрезки распределяются по плиткам отсечением clip_segments, каждая плитка
+    растеризуется отдельно в исходном порядке отрезков с отсечением по своим
+    границам, затем плитки собираются в один буфер. Пиксель целиком принадлежит
+    одной плитке, поэтому результат побитово совпадает с rasterize_serial.
+    Возвращает буфер (height, width, 3) и список (плитка, число отрезков, время).
+    """
+    seg = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    if isinstance(modes, str):
+        modes = [modes] * len(seg)
+    tasks = []
+    for rect in tile_rects(width, height, tile_size):
+        visible, _, _ = clip_segments(seg, rect)
+        indices = np.flatnonzero(visible)
+        if len(indices):
+            tasks.append((rect, seg[indices], [modes[i] for i in indices]))
+
+    buffer = Framebuffer(width, height).buffer
+    timings = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rect, tile, count, elapsed in pool.map(_rasterize_tile, tasks):
+            xmin, ymin, xmax, ymax = rect
+            buffer[ymin:ymax + 1, xmin:xmax + 1] = tile
+            timings.append((rect, count, elapsed))
+    return buffer, timings
+
+
+def print_tile_report(timings, wall_time):
+    """Вывод времени по плиткам и итогового ускорения относительно суммы времени плиток."""
+    busy = sum(elapsed for _, _, elapsed in timings)
+    for rect, count, elapsed in timings:
+        print(f"  Плитка {rect}: отрезков {count}, {elapsed * 1000:.2f} мс")
+    print(f"Плиток {len(timings)}, сумма по плиткам {busy * 1000:.2f} мс, "
+          f"общее время {wall_time * 1000:.2f} мс, ускорение {busy / wall_time if wall_time else 0:.2f}x")
+
+
+def read_segments(path, binary=None, chunk_size=65536):
+    """Чтение отрезков из файла порциями массивов (n, 4), не загружая файл целиком.
+
+    Текстовый файл содержит по отрезку x1 y1 x2 y2 в строке (пробелы или запятые,
+    комментарии после #), двоичный (.bin) — подряд идущие четверки int32 little-endian.
+    Строка не из четырех целых чисел или неполная четверка в конце двоичного файла
+    вызывают ValueError с именем файла и номером строки или смещением.
+    """
+    if binary is None:
+        binary = path.endswith(".bin")
+    if binary:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size % 16:
+                raise ValueError(f"{path}: неполная четверка int32 в конце файла, смещение {size - size % 16}")
+            while True:
+                chunk = np.fromfile(file, dtype="<i4", count=chunk_size * 4)
+                if not chunk.size:
+                    break
+                yield chunk.reshape(-1, 4).astype(np.int64)
+        return
+    rows = []
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            values = line.split("#", 1)[0].replace(",", " ").split()
+            if not values:
+                continue
+            try:
+                if len(values) != 4:
+                    raise ValueError
+                rows.append([int(value) for value in values])
+            except ValueError:
+                raise ValueError(f"{path}:{number}: ожидаются четыре целых числа x1 y1 x2 y2, "
+                                 f"получено {line.strip()!r}") from None
+            if len(rows) == chunk_size:
+                yield np.array(rows, dtype=np.int64)
+                rows = []
+    if rows:
+        yield np.array(rows, dtype=np.int64)
+
+
+def render_segments(chunks, mode, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+    """Растеризация потока порций отрезков в Framebuffer; возвращает буфер, число отрезков и пикселей."""
+    framebuffer = Framebuffer(width, height)
+    rect = (0, 0, width - 1, height - 1)
+    segment_count = 0
+    pixel_count = 0
+    for chunk in chunks:
+        segment_count += len(chunk)
+        if mode == "CDA":
+            # cda_batch выравнивает строки по самому длинному отрезку, поэтому порция делится на блоки
+            for start in range(0, len(chunk), 4096):
+                xs, ys, _ = cda_batch(chunk[start:start + 4096], rect)
+                framebuffer.draw_pixels(np.column_stack((xs, ys)))
+                pixel_count += len(xs)
+            continue
+        for x1, y1, x2, y2 in chunk.tolist():
+            pixel_count += rasterize_line(framebuffer, x1, y1, x2, y2, mode, rect)
+    return framebuffer, segment_count, pixel_count
+
+
+def write_png(path, image):
+    """Запись RGB-массива (h, w, 3) uint8 в PNG без сторонних библиотек."""
+    height, width = image.shape[:2]
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        file.write(chunk(b"IEND", b""))
+
+
+def write_image(path, image):
+    if path.lower().endswith(".png"):
+        write_png(path, image)
+    else:
+        with open(path, "wb") as file:
+            file.write(to_ppm(image))
+
+
+def run_batch(argv):
+    """Пакетный режим без окна Tk: файл отрезков -> изображение PPM или PNG и замер скорости."""
+    parser = argparse.ArgumentParser(description="Растеризация отрезков из файла без графического окна")
+    parser.add_argument("input", help="файл отрезков: текст x1 y1 x2 y2 или .bin с int32")
+    parser.add_argument("-a", "--algorithm", choices=LINE_MODES, default="CDA")
+    parser.add_argument("-o", "--output", default="out.png", help="изображение .png или .ppm")
+    parser.add_argument("--width", type=int, default=CANVAS_WIDTH)
+    parser.add_argument("--height", type=int, default=CANVAS_HEIGHT)
+    parser.add_argument("--format", choices=("auto", "text", "binary"), default="auto")
+    args = parser.parse_args(argv)
+
+    binary = None if args.format == "auto" else args.format == "binary"
+    started = time.perf_counter()
+    try:
+        framebuffer, segment_count, pixel_count = render_segments(
+            read_segments(args.input, binary), args.algorithm, args.width, args.height)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    raster_time = time.perf_counter() - started
+    write_image(args.output, framebuffer.buffer)
+    total_time = time.perf_counter() - started
+
+    rate = pixel_count / raster_time if raster_time else 0
+    print(f"{args.algorithm}: отрезков {segment_count}, пикселей {pixel_count}")
+    print(f"Чтение и растеризация: {raster_time:.3f} с ({rate:.0f} пикс/с), всего с записью: {total_time:.3f} с")
+
+
+def to_ppm(image):
+    """Кодирование RGB-массива (h, w, 3) uint8 в двоичный PPM для tk.PhotoImage."""
+    height, width = image.shape[:2]
+    return f"P6 {width} {height} 255\n".encode("ascii") + np.ascontiguousarray(image).tobytes()
+
+
+def zoom_region(buffer, x0, y0, cols, rows, scale, border=(200, 200, 200)):
+    """Область буфера cols x rows с левым верхним пикселем (x0, y0), увеличенная в scale раз.
+
+    Пиксели за пределами буфера белые. При увеличении от 4 раз каждая клетка
+    обводится цветом border, поэтому сетка входит в то же изображение.
+    """
+    region = np.full((rows, cols, 3), 255, dtype=np.uint8)
+    height, width = buffer.shape[:2]
+    src_x0, src_y0 = max(x0, 0), max(y0, 0)
+    src_x1, src_y1 = min(x0 + cols, width), min(y0 + rows, height)
+    if src_x0 < src_x1 and src_y0 < src_y1:
+        region[src_y0 - y0:src_y1 - y0, src_x0 - x0:src_x1 - x0] = buffer[src_y0:src_y1, src_x0:src_x1]
+    image = region.repeat(scale, axis=0).repeat(scale, axis=1)
+    if scale >= 4:
+        image[::scale, :] = border
+        image[:, ::scale] = border
+    return image
+
+
+class PixelInspector:
+    """Окно отладки с областью буфера кадра, увеличенной в N раз.
+
+    Увеличение и сдвиг обновляют одно изображение, а не сотни линий сетки.
+    Колесо мыши или +/- меняют увеличение, перетаскивание и стрелки сдвигают область.
+    """
+
+    MIN_SCALE = 1
+    MAX_SCALE = 32
+
+    def __init__(self, root, buffer_source, size=400, scale=8, on_close=None):
+        self.buffer_source = buffer_source
+        self.size = size
+        self.scale = scale
+        self.on_close = on_close
+        self.x0 = 0
+        self.y0 = 0
+        self.drag_start = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Просмотр пикселей")
+        self.canvas = tk.Canvas(self.window, width=size, height=size, bg="white", highlightthickness=0)
+        self.canvas.pack()
+        self.photo = tk.PhotoImage(width=size, height=size)
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(2 if event.delta > 0 else 0.5))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(2))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(0.5))
+        self.canvas.bind("<ButtonPress-1>", self.start_pan)
+        self.canvas.bind("<B1-Motion>", self.pan_drag)
+        self.window.bind("<plus>", lambda event: self.zoom(2))
+        self.window.bind("<minus>", lambda event: self.zoom(0.5))
+        self.window.bind("<Left>", lambda event: self.pan(-1, 0))
+        self.window.bind("<Right>", lambda event: self.pan(1, 0))
+        self.window.bind("<Up>", lambda event: self.pan(0, -1))
+        self.window.bind("<Down>", lambda event: self.pan(0, 1))
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    @property
+    def cells(self):
+        return max(1, self.size // self.scale)
+
+    def center_on(self, x, y):
+        self.x0 = x - self.cells // 2
+        self.y0 = y - self.cells // 2
+        self.refresh()
+
+    def zoom(self, factor):
+        scale = int(min(self.MAX_SCALE, max(self.MIN_SCALE, self.scale * factor)))
+        if scale == self.scale:
+            return
+        center_x = self.x0 + self.cells // 2
+        center_y = self.y0 + self.cells // 2
+        self.scale = scale
+        self.center_on(center_x, center_y)
+
+    def pan(self, dx, dy):
+        step = max(1, self.cells // 8)
+        self.x0 += dx * step
+        self.y0 += dy * step
+        self.refresh()
+
+    def start_pan(self, event):
+        self.drag_start = (event.x, event.y, self.x0, self.y0)
+
+    def pan_drag(self, event):
+        if self.drag_start is None:
+            return
+        start_x, start_y, x0, y0 = self.drag_start
+        self.x0 = x0 - (event.x - start_x) // self.scale
+        self.y0 = y0 - (event.y - start_y) // self.scale
+        self.refresh()
+
+    def refresh(self):
+        buffer = self.buffer_source()
+        if buffer is None:
+            return
+        image = zoom_region(buffer, self.x0, self.y0, self.cells, self.cells, self.scale)
+        self.photo.configure(data=to_ppm(image), format="PPM")
+        self.window.title(f"Просмотр пикселей: ({self.x0}, {self.y0}), x{self.scale}")
+
+    def close(self):
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
+
+
+class PreviewScheduler:
+    """Объединение серии событий движения мыши в одну перерисовку предпросмотра.
+
+    schedule() запоминает только последнее событие и ставит перерисовку через
+    after_idle, поэтому пока Tk занят, промежуточные события затирают друг друга.
+    """
+
+    def __init__(self, widget, redraw):
+        self.widget = widget
+        self.redraw = redraw
+        self.pending = None
+        self.after_id = None
+
+    def schedule(self, event):
+        self.pending = event
+        if self.after_id is None:
+            self.after_id = self.widget.after_idle(self._run)
+
+    def _run(self):
+        self.after_id = None
+        event, self.pending = self.pending, None
+        if event is not None:
+            self.redraw(event)
+
+    def flush(self):
+        """Немедленно выполнить отложенную перерисовку, если она есть."""
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self._run()
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+        self.after_id = None
+        self.pending = None
+
 
 class LineEditor:
     def __init__(self, root):
         self.root = root
         self.root.title("Графический редактор")
 
-        self.canvas = tk.Canvas(self.root, width=800, height=600, bg="white")
+        self.canvas = tk.Canvas(self.root, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, bg="white")
         self.canvas.pack()
 
         self.lines = []
         self.deleted_lines = []
+        # Растровые слои отрезков, параллельные self.lines и self.deleted_lines
+        self.line_layers = []
+        self.deleted_layers = []
 
         self.start_x = None
         self.start_y = None
@@ -22,6 +922,12 @@ class LineEditor:
         self.grid_lines = []
         self.grid_spacing = 20
 
+        self.backend_name = "Canvas"
+        self.backend = CanvasBackend(self.canvas)
+        self.clip_rect = VIEWPORT
+        self.inspector = None
+        self.preview = PreviewScheduler(self.root, self.redraw_preview)
+
         self.create_menu()
         self.create_toolbar()
 
@@ -36,10 +942,20 @@ class LineEditor:
         line_menu = Menu(menu, tearoff=0)
         line_menu.add_command(label="Алгоритм ЦДА", command=self.set_cda_mode)
         line_menu.add_command(label="Алгоритм Брезенхема", command=self.set_bresenham_mode)
+        line_menu.add_command(label="Алгоритм Брезенхема (серии)", command=self.set_run_slice_mode)
         line_menu.add_command(label="Алгоритм Ву", command=self.set_wu_mode)
+        line_menu.add_command(label="Алгоритм Ву (смешивание)", command=self.set_wu_blend_mode)
 
         menu.add_cascade(label="Отрезки", menu=line_menu)
 
+        output_menu = Menu(menu, tearoff=0)
+        output_menu.add_command(label="Элементы canvas", command=lambda: self.set_backend("Canvas"))
+        output_menu.add_command(label="Буфер кадра", command=lambda: self.set_backend("Framebuffer"))
+        output_menu.add_separator()
+        output_menu.add_command(label="Параллельная перерисовка", command=self.redraw_lines_tiled)
+
+        menu.add_cascade(label="Вывод", menu=output_menu)
+
     def create_toolbar(self):
         toolbar = tk.Frame(self.root, bg="lightgrey")
         toolbar.pack(side=tk.TOP, fill=tk.X)
@@ -53,6 +969,9 @@ class LineEditor:
         self.debug_btn = tk.Button(toolbar, text="Включить отладку", command=self.toggle_debug_mode)
         self.debug_btn.pack(side=tk.LEFT, padx=2, pady=2)
 
+        self.inspect_btn = tk.Button(toolbar, text="Просмотр пикселей", command=self.open_inspector)
+        self.inspect_btn.pack(side=tk.LEFT, padx=2, pady=2)
+
         self.update_buttons()
 
     def set_cda_mode(self):
@@ -63,102 +982,135 @@ class LineEditor:
         self.drawing_mode = "Bresenham"
         print("Выбран алгоритм Брезенхема")
 
+    def set_run_slice_mode(self):
+        self.drawing_mode = "RunSlice"
+        print("Выбран алгоритм Брезенхема со срезами")
+
     def set_wu_mode(self):
         self.drawing_mode = "Wu"
         print("Выбран алгоритм Ву")
 
+    def set_wu_blend_mode(self):
+        self.drawing_mode = "WuBlend"
+        print("Выбран алгоритм Ву со смешиванием")
+
+    def set_backend(self, name):
+        if name == self.backend_name:
+            return
+        self.backend.destroy()
+        if name == "Framebuffer":
+            self.backend = FramebufferBackend(self.canvas)
+        else:
+            self.backend = CanvasBackend(self.canvas)
+        self.backend_name = name
+        self.redraw_lines()
+        print(f"Выбран вывод: {name}")
+
+    def draw_line(self, x1, y1, x2, y2, mode):
+        if mode == "CDA":
+            self.draw_line_cda(x1, y1, x2, y2)
+        elif mode == "Bresenham":
+            self.draw_line_bresenham(x1, y1, x2, y2)
+        elif mode == "RunSlice":
+            self.draw_line_run_slice(x1, y1, x2, y2)
+        elif mode == "Wu":
+            self.draw_line_wu(x1, y1, x2, y2)
+        elif mode == "WuBlend":
+            self.draw_line_wu_blend(x1, y1, x2, y2)
+
+    def draw_line_layer(self, x1, y1, x2, y2, mode):
+        self.backend.begin_layer()
+        self.draw_line(x1, y1, x2, y2, mode)
+        return self.backend.end_layer()
+
+    def redraw_lines(self):
+        self.backend.clear()
+        self.line_layers = []
+        cda_run = []
+        for line, mode in self.lines:
+            if mode == "CDA":
+                cda_run.append(line)
+                continue
+            if cda_run:
+                self.line_layers.extend(self.draw_lines_cda(cda_run))
+                cda_run = []
+            self.line_layers.append(self.draw_line_layer(*line, mode))
+        if cda_run:
+            self.line_layers.extend(self.draw_lines_cda(cda_run))
+        # Слои удаленных отрезков принадлежали прежнему выводу и будут построены заново при восстановлении
+        self.deleted_layers = [None] * len(self.deleted_lines)
+        self.present()
+
+    def redraw_lines_tiled(self):
+        if not self.lines:
+            return
+        if self.backend_name != "Framebuffer":
+            self.set_backend("Framebuffer")
+        segments = [line for line, _ in self.lines]
+        modes = [mode for _, mode in self.lines]
+        started = time.perf_counter()
+        buffer, timings = rasterize_tiled(segments, modes, self.backend.width, self.backend.height)
+        wall_time = time.perf_counter() - started
+        self.backend.buffer[:] = buffer
+        # Плитки не хранят слоев отрезков: они будут построены заново при первой отмене
+        self.line_layers = [None] * len(self.lines)
+        self.present()
+        print_tile_report(timings, wall_time)
+
     def draw_line_cda(self, x1, y1, x2, y2):
-        dx = x2 - x1
-        dy = y2 - y1
-        steps = max(abs(dx), abs(dy))
-        x_inc = dx / steps
-        y_inc = dy / steps
-        x, y = x1, y1
-        for _ in range(steps + 1):
-            self.canvas.create_line(round(x), round(y), round(x) + 1, round(y) + 1, fill="black")
-            x += x_inc
-            y += y_inc
+        self.backend.draw_pixels(cda_pixels(x1, y1, x2, y2, self.clip_rect))
+
+    def draw_lines_cda(self, segments):
+        xs, ys, offsets = cda_batch(segments, self.clip_rect)
+        pixels = np.column_stack((xs, ys))
+        layers = []
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            self.backend.begin_layer()
+            self.backend.draw_pixels(pixels[start:stop])
+            layers.append(self.backend.end_layer())
+        return layers
 
     def draw_line_bresenham(self, x1, y1, x2, y2):
-        dx = abs(x2 - x1)
-        dy = abs(y2 - y1)
-        sx = 1 if x1 < x2 else -1
-        sy = 1 if y1 < y2 else -1
-        err = dx - dy
-        while True:
-            self.canvas.create_line(x1, y1, x1 + 1, y1 + 1, fill="black")
-            if x1 == x2 and y1 == y2:
-                break
-            e2 = 2 * err
-            if e2 > -dy:
-                err -= dy
-                x1 += sx
-            if e2 < dx:
-                err += dx
-                y1 += sy
+        self.backend.draw_pixels(bresenham_pixels(x1, y1, x2, y2, self.clip_rect))
+
+    def draw_line_run_slice(self, x1, y1, x2, y2):
+        self.backend.draw_spans(bresenham_runs(x1, y1, x2, y2, self.clip_rect))
 
     def draw_line_wu(self, x1, y1, x2, y2):
-        def plot(x, y, c):
-            self.canvas.create_line(x, y, x + 1, y + 1, fill=self._color_from_intensity(c))
+        self.backend.draw_pixels_intensity(wu_pixels(x1, y1, x2, y2, self.clip_rect))
 
-        def fpart(x):
-            return x - int(x)
+    def draw_line_wu_blend(self, x1, y1, x2, y2):
+        self.backend.draw_coverage(*wu_coverage(x1, y1, x2, y2, self.clip_rect))
 
-        def rfpart(x):
-            return 1 - fpart(x)
+    def present(self):
+        self.backend.present()
+        if self.inspector:
+            self.inspector.refresh()
 
-        steep = abs(y2 - y1) > abs(x2 - x1)
-        if steep:
-            x1, y1 = y1, x1
-            x2, y2 = y2, x2
-        if x1 > x2:
-            x1, x2 = x2, x1
-            y1, y2 = y2, y1
-        dx = x2 - x1
-        dy = y2 - y1
-        if dx == 0:
-            gradient = 1
-        else:
-            gradient = dy / dx
-        x_end = round(x1)
-        y_end = y1 + gradient * (x_end - x1)
-        x_gap = rfpart(x1 + 0.5)
-        xpxl1 = x_end
-        ypxl1 = int(y_end)
-        if steep:
-            plot(ypxl1, xpxl1, rfpart(y_end) * x_gap)
-            plot(ypxl1 + 1, xpxl1, fpart(y_end) * x_gap)
-        else:
-            plot(xpxl1, ypxl1, rfpart(y_end) * x_gap)
-            plot(xpxl1, ypxl1 + 1, fpart(y_end) * x_gap)
-        intery = y_end + gradient
-        x_end = round(x2)
-        y_end = y2 + gradient * (x_end - x2)
-        x_gap = fpart(x2 + 0.5)
-        xpxl2 = x_end
-        ypxl2 = int(y_end)
-        if steep:
-            plot(ypxl2, xpxl2, rfpart(y_end) * x_gap)
-            plot(ypxl2 + 1, xpxl2, fpart(y_end) * x_gap)
-        else:
-            plot(xpxl2, ypxl2, rfpart(y_end) * x_gap)
-            plot(xpxl2, ypxl2 + 1, fpart(y_end) * x_gap)
-        for x in range(xpxl1 + 1, xpxl2):
-            if steep:
-                plot(int(intery), x, rfpart(intery))
-                plot(int(intery) + 1, x, fpart(intery))
-            else:
-                plot(x, int(intery), rfpart(intery))
-                plot(x, int(intery) + 1, fpart(intery))
-            intery += gradient
+    def framebuffer(self):
+        if isinstance(self.backend, FramebufferBackend):
+            return self.backend.buffer
+        return None
+
+    def open_inspector(self):
+        if not self.debug_mode:
+            return
+        if self.inspector:
+            self.inspector.window.lift()
+            return
+        if self.backend_name != "Framebuffer":
+            print("Просмотр пикселей работает с буфером кадра: вывод переключен")
+            self.set_backend("Framebuffer")
+        self.inspector = PixelInspector(self.root, self.framebuffer, on_close=self.close_inspector)
 
-    def _color_from_intensity(self, intensity):
-        grayscale = int(255 * intensity)
-        grayscale = max(0, min(255, grayscale))
-        return f"#{grayscale:02x}{grayscale:02x}{grayscale:02x}"
+    def close_inspector(self):
+        self.inspector = None
 
     def start_drawing(self, event):
         if self.debug_mode:
+            if self.inspector:
+                self.inspector.center_on(event.x, event.y)
+                return
             print("Режим отладки включен: рисование отключено")
             return
         self.start_x = event.x
@@ -167,54 +1119,60 @@ class LineEditor:
     def update_drawing(self, event):
         if self.debug_mode:
             return
+        self.preview.schedule(event)
+
+    def redraw_preview(self, event):
         if self.current_line:
-            self.canvas.delete(self.current_line)
-        self.current_line = self.canvas.create_line(self.start_x, self.start_y, event.x, event.y, fill="black")
+            self.canvas.coords(self.current_line, self.start_x, self.start_y, event.x, event.y)
+        else:
+            self.current_line = self.canvas.create_line(self.start_x, self.start_y, event.x, event.y, fill="black")
 
     def finish_drawing(self, event):
         if self.debug_mode:
             return
+        self.preview.flush()
         if self.current_line:
             x1, y1, x2, y2 = self.start_x, self.start_y, event.x, event.y
             self.canvas.delete(self.current_line)
-            if self.drawing_mode == "CDA":
-                self.draw_line_cda(x1, y1, x2, y2)
-            elif self.drawing_mode == "Bresenham":
-                self.draw_line_bresenham(x1, y1, x2, y2)
-            elif self.drawing_mode == "Wu":
-                self.draw_line_wu(x1, y1, x2, y2)
+            items_before = self.backend.items_created
+            started = time.perf_counter()
+            layer = self.draw_line_layer(x1, y1, x2, y2, self.drawing_mode)
+            self.present()
+            elapsed = time.perf_counter() - started
+            print(f"{self.drawing_mode} ({self.backend_name}): {elapsed * 1000:.2f} мс, "
+                  f"создано элементов canvas: {self.backend.items_created - items_before}")
             self.lines.append(((x1, y1, x2, y2), self.drawing_mode))
+            self.line_layers.append(layer)
             self.current_line = None
             self.update_buttons()
 
     def delete_last_line(self):
         if self.debug_mode and self.lines:
             line_data = self.lines.pop()
+            layer = self.line_layers.pop()
             self.deleted_lines.append(line_data)
-            self.canvas.delete("all")
-            if self.debug_mode:
-                self.draw_grid()
-            for line, mode in self.lines:
-                x1, y1, x2, y2 = line
-                if mode == "CDA":
-                    self.draw_line_cda(x1, y1, x2, y2)
-                elif mode == "Bresenham":
-                    self.draw_line_bresenham(x1, y1, x2, y2)
-                elif mode == "Wu":
-                    self.draw_line_wu(x1, y1, x2, y2)
+            self.deleted_layers.append(layer)
+            if layer is None:
+                self.redraw_lines()
+            else:
+                self.backend.hide_layer(layer)
+            self.present()
             self.update_buttons()
 
+    def restore_line(self):
+        line_data, mode = self.deleted_lines.pop()
+        layer = self.deleted_layers.pop()
+        if layer is None:
+            layer = self.draw_line_layer(*line_data, mode)
+        else:
+            self.backend.show_layer(layer)
+        self.lines.append((line_data, mode))
+        self.line_layers.append(layer)
+
     def restore_last_line(self):
         if self.debug_mode and self.deleted_lines:
-            line_data, mode = self.deleted_lines.pop()
-            x1, y1, x2, y2 = line_data
-            self.lines.append((line_data, mode))
-            if mode == "CDA":
-                self.draw_line_cda(x1, y1, x2, y2)
-            elif mode == "Bresenham":
-                self.draw_line_bresenham(x1, y1, x2, y2)
-            elif mode == "Wu":
-                self.draw_line_wu(x1, y1, x2, y2)
+            self.restore_line()
+            self.present()
             self.update_buttons()
 
     def toggle_debug_mode(self):
@@ -225,16 +1183,11 @@ class LineEditor:
         else:
             self.debug_btn.config(text="Включить отладку")
             self.clear_grid()
+            if self.inspector:
+                self.inspector.close()
             while self.deleted_lines:
-                line_data, mode = self.deleted_lines.pop()
-                x1, y1, x2, y2 = line_data
-                self.lines.append((line_data, mode))
-                if mode == "CDA":
-                    self.draw_line_cda(x1, y1, x2, y2)
-                elif mode == "Bresenham":
-                    self.draw_line_bresenham(x1, y1, x2, y2)
-                elif mode == "Wu":
-                    self.draw_line_wu(x1, y1, x2, y2)
+                self.restore_line()
+            self.present()
         self.update_buttons()
 
     def draw_grid(self):
@@ -264,8 +1217,13 @@ class LineEditor:
         else:
             self.restore_btn.config(state=tk.NORMAL)
 
+        self.inspect_btn.config(state=tk.NORMAL if self.debug_mode else tk.DISABLED)
+
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    editor = LineEditor(root)
-    root.mainloop()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        run_batch(sys.argv[1:])
+    else:
+        root = tk.Tk()
+        editor = LineEditor(root)
+        root.mainloop()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+
+LINE_MODES = ("CDA", "Bresenham", "RunSlice", "Wu", "WuBlend")
+
+
+def make_editor(test):
+    """Редактор без окна: виджеты Tk заменены заглушками до конца теста, алгоритмы и буферы настоящие."""
+    patches = [mock.patch.object(main.tk, name) for name in ("Canvas", "Frame", "Button", "PhotoImage")]
+    patches.append(mock.patch.object(main, "Menu"))
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
+    editor = main.LineEditor(mock.MagicMock())
+    editor.canvas.winfo_width.return_value = main.CANVAS_WIDTH
+    editor.canvas.winfo_height.return_value = main.CANVAS_HEIGHT
+    return editor
+
+
+def draw(editor, x1, y1, x2, y2):
+    editor.start_drawing(SimpleNamespace(x=x1, y=y1))
+    editor.update_drawing(SimpleNamespace(x=x2, y=y2))
+    editor.finish_drawing(SimpleNamespace(x=x2, y=y2))
+
+
+class LineEditorSmokeTest(unittest.TestCase):
+    def check_undo_redo(self, backend):
+        editor = make_editor(self)
+        editor.set_backend(backend)
+        for mode in LINE_MODES:
+            editor.drawing_mode = mode
+            draw(editor, 10, 20, 300, 150)
+        self.assertEqual(len(editor.lines), len(LINE_MODES))
+
+        editor.toggle_debug_mode()
+        editor.delete_last_line()
+        editor.delete_last_line()
+        self.assertEqual(len(editor.lines), len(LINE_MODES) - 2)
+        self.assertEqual(len(editor.deleted_lines), 2)
+        editor.restore_last_line()
+        self.assertEqual(len(editor.lines), len(LINE_MODES) - 1)
+        editor.toggle_debug_mode()
+        self.assertEqual(len(editor.lines), len(LINE_MODES))
+        self.assertEqual(editor.deleted_lines, [])
+
+    def test_canvas_backend(self):
+        self.check_undo_redo("Canvas")
+
+    def test_framebuffer_backend(self):
+        self.check_undo_redo("Framebuffer")
+
+    def test_framebuffer_matches_serial_rasterization(self):
+        editor = make_editor(self)
+        editor.set_backend("Framebuffer")
+        for mode in LINE_MODES:
+            editor.drawing_mode = mode
+            draw(editor, -50, 590, 850, 10)
+        segments = [line for line, _ in editor.lines]
+        modes = [mode for _, mode in editor.lines]
+        self.assertTrue((editor.backend.buffer == main.rasterize_serial(segments, modes)).all())
+
+
+class ReadSegmentsTest(unittest.TestCase):
+    def write(self, data, suffix=".txt"):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, "wb") as file:
+            file.write(data.encode("utf-8") if isinstance(data, str) else data)
+        return path
+
+    def read(self, path):
+        return [row.tolist() for chunk in main.read_segments(path, chunk_size=2) for row in chunk]
+
+    def test_text(self):
+        path = self.write("# x1 y1 x2 y2\n1 2 3 4\n\n5,6,7,8  # comment\n-1 0 0 -1\n")
+        self.assertEqual(self.read(path), [[1, 2, 3, 4], [5, 6, 7, 8], [-1, 0, 0, -1]])
+
+    def test_binary(self):
+        path = self.write(main.np.arange(12, dtype="<i4").tobytes(), ".bin")
+        self.assertEqual(self.read(path), [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11]])
+
+    def test_malformed_lines_report_line_number(self):
+        for line in ("1 2 3", "1 2 3 4 5", "1 2 3.5 4", "1 2 x 4"):
+            path = self.write(f"0 0 1 1\n\n{line}\n")
+            with self.assertRaisesRegex(ValueError, f":3: .*{line!r}"):
+                self.read(path)
+
+    def test_truncated_binary(self):
+        path = self.write(main.np.arange(6, dtype="<i4").tobytes(), ".bin")
+        with self.assertRaisesRegex(ValueError, "смещение 16"):
+            self.read(path)
+
+    def test_batch_reports_bad_input(self):
+        path = self.write("0 0 10 10\n1 2 3\n")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as exit_info:
+            main.run_batch([path, "-o", path + ".png"])
+        self.assertEqual(exit_info.exception.code, 2)
+        self.assertIn(f"{path}:2:", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
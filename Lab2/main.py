@@ -1,6 +1,646 @@
 import tkinter as tk
 from tkinter import ttk
 import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 600
+PREVIEW_SEGMENTS = 64  # Звеньев в ломаной предпросмотра одной ветви кривой
+OFFSET_CACHE_BYTES = 16 * 1024 * 1024  # Предел памяти кэша смещений кривых
+SHAPE_TYPES = ("Circle", "Ellipse", "Hyperbola", "Parabola")
+
+
+def mirror_octant(xs, ys):
+    """Отражение точек одной октанты окружности на все восемь октант без повторов."""
+    points = np.concatenate([
+        np.column_stack((sx * a, sy * b))
+        for a, b in ((xs, ys), (ys, xs))
+        for sx in (1, -1)
+        for sy in (1, -1)
+    ])
+    return np.unique(points, axis=0)
+
+
+def midpoint_circle(radius):
+    """Смещения пикселей окружности радиуса radius от центра по алгоритму средней точки.
+
+    Целочисленно строится одна октанта (от x = 0 до x = y), остальные семь
+    получаются отражением. Возвращает массив (n, 2) int64 без повторов.
+    """
+    x, y = 0, radius
+    d = 1 - radius
+    xs, ys = [], []
+    while x <= y:
+        xs.append(x)
+        ys.append(y)
+        if d < 0:
+            d += 2 * x + 3
+        else:
+            d += 2 * (x - y) + 5
+            y -= 1
+        x += 1
+    return mirror_octant(np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64))
+
+
+def visible_offsets(lo, hi, limit):
+    """Отрезки [start, stop] смещений 0 <= t <= limit, у которых t или -t лежит в [lo, hi]."""
+    intervals = sorted([max(start, 0), min(stop, limit)] for start, stop in ((lo, hi), (-hi, -lo)))
+    merged = []
+    for start, stop in intervals:
+        if start > stop:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+
+def midpoint_ellipse_quadrant(a, b, clip=None):
+    """Пиксели первой четверти эллипса с полуосями a, b по двухобластному алгоритму средней точки.
+
+    Решающие величины целые и умножены на 4, чтобы убрать 1/2 и 1/4 из средних
+    точек. В области 1 (наклон меньше 1) шаг идет по x, в области 2 — по y,
+    поэтому контур связный даже у очень вытянутых эллипсов. clip — прямоугольник
+    (xmin, ymin, xmax, ymax) в смещениях от центра: обходятся только столбцы и
+    строки, отражения которых могут в него попасть, а состояние алгоритма в начале
+    каждого участка вычисляется напрямую. Возвращает списки xs, ys.
+    """
+    a2, b2 = a * a, b * b
+
+    def region1_y(x):
+        # y в столбце x: на каждом шаге он уменьшается не больше чем на 1, поэтому
+        # берется наибольший y в предыдущем столбце, у которого средняя точка
+        # (x - 1, y - 1/2) лежит внутри эллипса, и проверяется средняя точка (x, y - 1/2)
+        if x == 0:
+            return b
+        rhs = 4 * b2 * (a2 - (x - 1) ** 2)
+        y = (math.isqrt(max(-(-rhs // a2) - 1, 0)) + 1) // 2
+        if 4 * b2 * x * x + a2 * (2 * y - 1) ** 2 - 4 * a2 * b2 >= 0:
+            y -= 1
+        return y
+
+    # Первый столбец области 2 ищется делением пополам: условие b²x < a²y монотонно по x
+    lo, hi = 0, a + 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if b2 * mid < a2 * region1_y(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+    x_switch = lo
+    y_switch = region1_y(x_switch)
+
+    def region2_x(y):
+        # Наибольший x, при котором средняя точка (x - 1/2, y) лежит внутри эллипса, но не левее x_switch
+        if y == y_switch or b == 0:
+            return x_switch
+        rhs = 4 * a2 * (b2 - y * y)
+        return max(x_switch, (math.isqrt(rhs // b2) + 1) // 2)
+
+    columns = [[0, a]] if clip is None else visible_offsets(clip[0], clip[2], a)
+    rows = [[0, b]] if clip is None else visible_offsets(clip[1], clip[3], b)
+    xs, ys = [], []
+
+    # Область 1: шаг по x, решающая величина 4F(x + 1, y - 1/2)
+    for start, stop in columns:
+        x = start
+        stop = min(stop, x_switch - 1)
+        if x > stop:
+            continue
+        y = region1_y(x)
+        d1 = 4 * b2 * (x + 1) ** 2 + a2 * (2 * y - 1) ** 2 - 4 * a2 * b2
+        while x <= stop:
+            xs.append(x)
+            ys.append(y)
+            x += 1
+            if d1 < 0:
+                d1 += 4 * b2 * (2 * x + 1)
+            else:
+                y -= 1
+                d1 += 4 * b2 * (2 * x + 1) - 8 * a2 * y
+
+    # Область 2: шаг по y сверху вниз, решающая величина 4F(x + 1/2, y - 1)
+    for start, stop in reversed(rows):
+        y = min(stop, y_switch)
+        if y < start:
+            continue
+        x = region2_x(y)
+        d2 = b2 * (2 * x + 1) ** 2 + 4 * a2 * (y - 1) ** 2 - 4 * a2 * b2
+        while y >= start:
+            xs.append(x)
+            ys.append(y)
+            y -= 1
+            if d2 > 0:
+                d2 += 4 * a2 * (1 - 2 * y)
+            else:
+                x += 1
+                d2 += 4 * a2 * (1 - 2 * y) + 8 * b2 * x
+
+    # У очень плоских эллипсов область 2 может закончиться раньше x = a: добиваем вершину
+    x_end = region2_x(0)
+    if rows and rows[0][0] == 0:
+        for start, stop in columns:
+            for x in range(max(start, x_end + 1), stop + 1):
+                xs.append(x)
+                ys.append(0)
+    return xs, ys
+
+
+def mirror_quadrant(xs, ys):
+    """Отражение точек первой четверти эллипса на все четыре четверти без повторов."""
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    points = np.concatenate([np.column_stack((sx * xs, sy * ys)) for sx in (1, -1) for sy in (1, -1)])
+    return np.unique(points, axis=0)
+
+
+def midpoint_ellipse(a, b, clip=None):
+    """Смещения пикселей эллипса с полуосями a, b от центра, массив (n, 2) int64 без повторов."""
+    xs, ys = midpoint_ellipse_quadrant(a, b, clip)
+    return mirror_quadrant(xs, ys)
+
+
+def midpoint_hyperbola_quadrant(a, height, x_max=None, y_max=None):
+    """Пиксели правой верхней четверти гиперболы y²/b² - x²/a² = 1, где b = height / 2.
+
+    Работа идет в удвоенных координатах, решающая величина
+    K(X, Y) = 4a²Y² - height²X² - 4a²height² целая, ее приращения тоже. Пока наклон
+    меньше 1, шаг идет по x, затем по y, так что каждый пиксель выдается один раз и
+    без разрывов. Кривая строится при 0 <= x <= min(a, x_max) и y <= y_max.
+    """
+    x_max = a if x_max is None else min(a, x_max)
+    a4, h2 = 4 * a * a, height * height
+    # При x = a ветвь поднимается до b√2, дальше столбец x = a не продолжается
+    y_end = (math.isqrt(2 * h2) + 1) // 2
+    y_max = y_end if y_max is None else min(y_max, y_end)
+    x, y = 0, height // 2
+    xs, ys = [], []
+
+    # Область 1: средняя точка (x + 1, y + 1/2)
+    d1 = a4 * (2 * y + 1) ** 2 - h2 * (2 * x + 2) ** 2 - a4 * h2
+    while x <= x_max and y <= y_max and 2 * h2 * (x + 1) < a4 * (2 * y + 1):
+        xs.append(x)
+        ys.append(y)
+        x += 1
+        if d1 < 0:
+            y += 1
+            d1 += 8 * a4 * y
+        d1 -= h2 * (8 * x + 4)
+
+    # Область 2: средняя точка (x + 1/2, y + 1)
+    d2 = a4 * (2 * y + 2) ** 2 - h2 * (2 * x + 1) ** 2 - a4 * h2
+    while x <= x_max and y <= y_max:
+        xs.append(x)
+        ys.append(y)
+        y += 1
+        if d2 > 0:
+            x += 1
+            d2 -= 8 * h2 * x
+        d2 += a4 * (8 * y + 4)
+    return xs, ys
+
+
+def midpoint_parabola_half(p, width, y_max=None):
+    """Пиксели правой половины параболы x² = 2py при 0 <= x <= width и y <= y_max.
+
+    В удвоенных координатах решающая величина K(X, Y) = X² - 4pY целая. Пока
+    наклон x / p меньше 1, шаг идет по x, дальше по y.
+    """
+    y_end = (width * width + p) // (2 * p)  # Высота параболы при x = width
+    y_max = y_end if y_max is None else min(y_max, y_end)
+    x, y = 0, 0
+    xs, ys = [], []
+
+    # Область 1: средняя точка (x + 1, y + 1/2)
+    d1 = (2 * x + 2) ** 2 - 4 * p * (2 * y + 1)
+    while x <= width and y <= y_max and x + 1 < p:
+        xs.append(x)
+        ys.append(y)
+        x += 1
+        if d1 > 0:
+            y += 1
+            d1 -= 8 * p
+        d1 += 8 * x + 4
+
+    # Область 2: средняя точка (x + 1/2, y + 1)
+    d2 = (2 * x + 1) ** 2 - 4 * p * (2 * y + 2)
+    while x <= width and y <= y_max:
+        xs.append(x)
+        ys.append(y)
+        y += 1
+        if d2 < 0:
+            x += 1
+            d2 += 8 * x
+        d2 -= 8 * p
+    return xs, ys
+
+
+def midpoint_hyperbola(a, height, x_max=None, y_max=None):
+    """Смещения пикселей обеих ветвей гиперболы от центра, массив (n, 2) int64 без повторов."""
+    xs, ys = midpoint_hyperbola_quadrant(a, height, x_max, y_max)
+    return mirror_quadrant(xs, ys)
+
+
+def midpoint_parabola(p, width, y_max=None):
+    """Смещения пикселей параболы x² = 2py от вершины, массив (n, 2) int64 без повторов."""
+    xs, ys = midpoint_parabola_half(p, width, y_max)
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    return np.unique(np.concatenate([np.column_stack((xs, ys)), np.column_stack((-xs, ys))]), axis=0)
+
+
+def hyperbola_polylines(a, b, segments=PREVIEW_SEGMENTS):
+    """Ветви гиперболы y²/b² - x²/a² = 1 при |x| <= a ломаными из segments звеньев.
+
+    Используется параметризация x = a sh u, y = b ch u с равным шагом по u,
+    поэтому число точек не зависит от размера кривой.
+    """
+    u = np.linspace(-math.asinh(1), math.asinh(1), segments + 1)
+    xs, ys = a * np.sinh(u), b * np.cosh(u)
+    return [np.column_stack((xs, ys)), np.column_stack((xs, -ys))]
+
+
+def parabola_polyline(p, width, segments=PREVIEW_SEGMENTS):
+    """Парабола x² = 2py при |x| <= width ломаной из segments звеньев с равным шагом по x.
+
+    Прогиб звена (2 * width / segments)² / 8p, поэтому width стоит ограничивать
+    видимой частью: при высоте h он не превышает h / segments².
+    """
+    xs = np.linspace(-width, width, segments + 1)
+    return np.column_stack((xs, xs ** 2 / (2 * p)))
+
+
+def conic_coefficients(shape, a, b, angle=0.0):
+    """Коэффициенты (A, B, C, D, E, F) уравнения Ax² + Bxy + Cy² + Dx + Ey + F = 0 кривой shape.
+
+    Центр (вершина у параболы) в начале координат, a и b — параметры как в
+    ShapeStore, angle — поворот в градусах (на экране с осью y вниз — по часовой
+    стрелке). Сначала записывается уравнение в собственных осях u, v, затем
+    подставляются u = x cos + y sin, v = -x sin + y cos.
+    """
+    if shape in ("Circle", "Ellipse"):
+        uu, vv, u, v, f = b * b, a * a, 0.0, 0.0, -a * a * b * b
+    elif shape == "Hyperbola":
+        uu, vv, u, v, f = -b * b, a * a, 0.0, 0.0, -a * a * b * b
+    else:
+        uu, vv, u, v, f = 1.0, 0.0, 0.0, -2.0 * a, 0.0
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    return (uu * c * c + vv * s * s, 2 * c * s * (uu - vv), uu * s * s + vv * c * c,
+            u * c - v * s, u * s + v * c, f)
+
+
+def conic_outline(shape, a, b, angle=0.0, segments=PREVIEW_SEGMENTS):
+    """Ломаные кривой shape с центром в начале координат, повернутые на angle градусов."""
+    if shape in ("Circle", "Ellipse"):
+        t = np.linspace(0, 2 * math.pi, 4 * segments + 1)
+        polylines = [np.column_stack((a * np.cos(t), b * np.sin(t)))]
+    elif shape == "Hyperbola":
+        polylines = hyperbola_polylines(a, b, segments)
+    else:
+        polylines = [parabola_polyline(a, b, segments)]
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    rotation = np.array([[c, s], [-s, c]])
+    return [polyline @ rotation for polyline in polylines]
+
+
+def line_crossings(a, b, c, d, e, f, lines, low, high):
+    """Пиксели (t, round(s)) пересечений кривой as² + bst + ct² + ds + et + f = 0 с прямыми t = lines[0]..lines[1].
+
+    На каждой прямой уравнение квадратное по s, корни всех прямых находятся
+    векторно по устойчивой формуле (она же дает единственный корень при a = 0).
+    Пересечения с округлением вне low <= s <= high отбрасываются.
+    """
+    t = np.arange(lines[0], lines[1] + 1, dtype=np.float64)
+    p, q = b * t + d, (c * t + e) * t + f
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half = -(p + np.copysign(np.sqrt(p * p - 4 * a * q), p)) / 2
+        roots = np.stack((half / a, q / half))
+    t = np.broadcast_to(t, roots.shape)
+    s = np.floor(roots + 0.5)
+    keep = np.isfinite(roots) & (s >= low) & (s <= high)
+    return np.column_stack((t[keep], s[keep])).astype(np.int64)
+
+
+def implicit_conic_pixels(coeffs, rect):
+    """Пиксели кривой Ax² + Bxy + Cy² + Dx + Ey + F = 0 в прямоугольнике rect = (xmin, ymin, xmax, ymax).
+
+    Берутся точные пересечения кривой со столбцами x = const и строками
+    y = const через центры пикселей, каждое округляется до ближайшего пикселя.
+    Соседние вдоль кривой пересечения лежат на сторонах одного квадрата между
+    четырьмя центрами, поэтому их пиксели соседние и растр 8-связен даже на
+    узких концах тонких эллипсов. Где кривая ближе к горизонтали, пересечение
+    со строкой округляется в пиксель, уже найденный по столбцу, как в алгоритме
+    средней точки, так что линия не утолщается. Возвращает массив (n, 2) int64 без повторов.
+    """
+    a, b, c, d, e, f = coeffs
+    xmin, ymin, xmax, ymax = rect
+    if xmin > xmax or ymin > ymax:
+        return np.empty((0, 2), dtype=np.int64)
+    columns = line_crossings(c, b, a, e, d, f, (xmin, xmax), ymin, ymax)
+    rows = line_crossings(a, b, c, d, e, f, (ymin, ymax), xmin, xmax)[:, ::-1]
+    return np.unique(np.concatenate((columns, rows)), axis=0)
+
+
+def rasterize_conic(shape, a, b, angle, rect):
+    """Смещения пикселей повернутой кривой shape от центра в пределах rect.
+
+    Вычисления ограничены описанным прямоугольником контура; у гиперболы и
+    параболы пиксели за концами дуги (|u| > a и |u| > b соответственно) отбрасываются.
+    """
+    points = np.concatenate(conic_outline(shape, a, b, angle))
+    low = np.floor(points.min(axis=0)).astype(int) - 2
+    high = np.ceil(points.max(axis=0)).astype(int) + 2
+    bounds = (max(rect[0], low[0]), max(rect[1], low[1]), min(rect[2], high[0]), min(rect[3], high[1]))
+    pixels = implicit_conic_pixels(conic_coefficients(shape, a, b, angle), bounds)
+    if shape in ("Hyperbola", "Parabola"):
+        # Конец дуги отсекается по той собственной оси, вдоль которой кривая там идет быстрее
+        if shape == "Hyperbola":
+            end, slope = (a, b * math.sqrt(2)), b / (a * math.sqrt(2))
+        else:
+            end, slope = (b, b * b / (2 * a)), b / a
+        c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+        if slope <= 1:
+            pixels = pixels[np.abs(pixels[:, 0] * c + pixels[:, 1] * s) <= end[0] + 0.5]
+        else:
+            pixels = pixels[np.abs(pixels[:, 1] * c - pixels[:, 0] * s) <= end[1] + 0.5]
+    return pixels
+
+
+def geometric_params(shape, params):
+    """Целочисленные параметры растрирования -> параметры a, b как в ShapeStore."""
+    if shape == "Circle":
+        return params * 2
+    if shape == "Hyperbola":
+        return params[0], params[1] / 2
+    return params
+
+
+class ShapeStore:
+    """Нарисованные фигуры в виде структуры массивов, без обращений к элементам Tk.
+
+    kinds — индексы в SHAPE_TYPES, centers — центры (вершина у параболы),
+    params — пары параметров: полуоси a, b у окружности, эллипса и гиперболы
+    (у окружности обе равны радиусу), параметр p и полуширина у параболы
+    x² = 2py. angles — поворот в градусах, raster отмечает фигуры, выведенные в
+    буфер кадра, items хранит id элементов canvas остальных фигур.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.kinds = np.empty(capacity, dtype=np.int8)
+        self.centers = np.empty((capacity, 2), dtype=np.float64)
+        self.params = np.empty((capacity, 2), dtype=np.float64)
+        self.angles = np.empty(capacity, dtype=np.float64)
+        self.raster = np.empty(capacity, dtype=bool)
+        self.items = []
+
+    def __len__(self):
+        return self.count
+
+    def append(self, shape, center, params, raster, items=(), angle=0.0):
+        if self.count == len(self.kinds):
+            # Емкость удваивается, добавление остается амортизированно O(1)
+            capacity = 2 * len(self.kinds)
+            self.kinds = np.resize(self.kinds, capacity)
+            self.centers = np.resize(self.centers, (capacity, 2))
+            self.params = np.resize(self.params, (capacity, 2))
+            self.angles = np.resize(self.angles, capacity)
+            self.raster = np.resize(self.raster, capacity)
+        index = self.count
+        self.kinds[index] = SHAPE_TYPES.index(shape)
+        self.centers[index] = center
+        self.params[index] = params
+        self.angles[index] = angle
+        self.raster[index] = raster
+        self.items.append(list(items))
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+        self.items = []
+
+
+class OffsetCache:
+    """LRU-кэш смещений пикселей кривых от центра: смещения не зависят от положения фигуры.
+
+    Ключ — вид кривой и ее целочисленные параметры, значение — массив (n, 2) int16.
+    Суммарный объем массивов не превышает max_bytes, при переполнении вытесняются
+    давно не использованные записи. hits и misses считают попадания и промахи.
+    """
+
+    def __init__(self, max_bytes=OFFSET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """Смещения по ключу; при промахе вычисляются функцией compute() и запоминаются."""
+        offsets = self.entries.get(key)
+        if offsets is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return offsets
+        self.misses += 1
+        offsets = np.ascontiguousarray(compute(), dtype=np.int16)
+        if offsets.nbytes <= self.max_bytes:
+            self.entries[key] = offsets
+            self.nbytes += offsets.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return offsets
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+
+class Framebuffer:
+    """RGB-буфер NumPy, общий для растровых алгоритмов кривых второго порядка."""
+
+    def __init__(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT, background=(255, 255, 255)):
+        self.width = width
+        self.height = height
+        self.background = np.array(background, dtype=np.uint8)
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self.buffer[:] = self.background
+
+    def draw_pixels(self, pixels, color=(0, 0, 0)):
+        """Запись пикселей (n, 2); пиксели за пределами буфера отбрасываются."""
+        if len(pixels) == 0:
+            return 0
+        xy = np.asarray(pixels, dtype=np.int64)
+        xs, ys = xy[:, 0], xy[:, 1]
+        mask = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.buffer[ys[mask], xs[mask]] = color
+        return int(mask.sum())
+
+    def draw_offsets(self, offsets, origin, color=(0, 0, 0)):
+        """Запись смещений (n, 2) относительно точки origin, например из OffsetCache."""
+        return self.draw_pixels(offsets.astype(np.int32) + np.asarray(origin, dtype=np.int32), color)
+
+    def clear(self):
+        self.buffer[:] = self.background
+
+    def to_ppm(self):
+        return to_ppm(self.buffer)
+
+
+def to_ppm(image):
+    """Кодирование RGB-массива (h, w, 3) uint8 в двоичный PPM для tk.PhotoImage."""
+    height, width = image.shape[:2]
+    return f"P6 {width} {height} 255\n".encode("ascii") + np.ascontiguousarray(image).tobytes()
+
+
+def zoom_region(buffer, x0, y0, cols, rows, scale, border=(200, 200, 200)):
+    """Область буфера cols x rows с левым верхним пикселем (x0, y0), увеличенная в scale раз.
+
+    Пиксели за пределами буфера белые. При увеличении от 4 раз каждая клетка
+    обводится цветом border, поэтому сетка входит в то же изображение.
+    """
+    region = np.full((rows, cols, 3), 255, dtype=np.uint8)
+    height, width = buffer.shape[:2]
+    src_x0, src_y0 = max(x0, 0), max(y0, 0)
+    src_x1, src_y1 = min(x0 + cols, width), min(y0 + rows, height)
+    if src_x0 < src_x1 and src_y0 < src_y1:
+        region[src_y0 - y0:src_y1 - y0, src_x0 - x0:src_x1 - x0] = buffer[src_y0:src_y1, src_x0:src_x1]
+    image = region.repeat(scale, axis=0).repeat(scale, axis=1)
+    if scale >= 4:
+        image[::scale, :] = border
+        image[:, ::scale] = border
+    return image
+
+
+class PixelInspector:
+    """Окно отладки с областью буфера кадра, увеличенной в N раз.
+
+    Увеличение и сдвиг обновляют одно изображение, а не сотни линий сетки.
+    Колесо мыши или +/- меняют увеличение, перетаскивание и стрелки сдвигают область.
+    """
+
+    MIN_SCALE = 1
+    MAX_SCALE = 32
+
+    def __init__(self, root, buffer_source, size=400, scale=8, on_close=None):
+        self.buffer_source = buffer_source
+        self.size = size
+        self.scale = scale
+        self.on_close = on_close
+        self.x0 = 0
+        self.y0 = 0
+        self.drag_start = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Просмотр пикселей")
+        self.canvas = tk.Canvas(self.window, width=size, height=size, bg="white", highlightthickness=0)
+        self.canvas.pack()
+        self.photo = tk.PhotoImage(width=size, height=size)
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(2 if event.delta > 0 else 0.5))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(2))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(0.5))
+        self.canvas.bind("<ButtonPress-1>", self.start_pan)
+        self.canvas.bind("<B1-Motion>", self.pan_drag)
+        self.window.bind("<plus>", lambda event: self.zoom(2))
+        self.window.bind("<minus>", lambda event: self.zoom(0.5))
+        self.window.bind("<Left>", lambda event: self.pan(-1, 0))
+        self.window.bind("<Right>", lambda event: self.pan(1, 0))
+        self.window.bind("<Up>", lambda event: self.pan(0, -1))
+        self.window.bind("<Down>", lambda event: self.pan(0, 1))
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    @property
+    def cells(self):
+        return max(1, self.size // self.scale)
+
+    def center_on(self, x, y):
+        self.x0 = x - self.cells // 2
+        self.y0 = y - self.cells // 2
+        self.refresh()
+
+    def zoom(self, factor):
+        scale = int(min(self.MAX_SCALE, max(self.MIN_SCALE, self.scale * factor)))
+        if scale == self.scale:
+            return
+        center_x = self.x0 + self.cells // 2
+        center_y = self.y0 + self.cells // 2
+        self.scale = scale
+        self.center_on(center_x, center_y)
+
+    def pan(self, dx, dy):
+        step = max(1, self.cells // 8)
+        self.x0 += dx * step
+        self.y0 += dy * step
+        self.refresh()
+
+    def start_pan(self, event):
+        self.drag_start = (event.x, event.y, self.x0, self.y0)
+
+    def pan_drag(self, event):
+        if self.drag_start is None:
+            return
+        start_x, start_y, x0, y0 = self.drag_start
+        self.x0 = x0 - (event.x - start_x) // self.scale
+        self.y0 = y0 - (event.y - start_y) // self.scale
+        self.refresh()
+
+    def refresh(self):
+        buffer = self.buffer_source()
+        if buffer is None:
+            return
+        image = zoom_region(buffer, self.x0, self.y0, self.cells, self.cells, self.scale)
+        self.photo.configure(data=to_ppm(image), format="PPM")
+        self.window.title(f"Просмотр пикселей: ({self.x0}, {self.y0}), x{self.scale}")
+
+    def close(self):
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
+
+
+class PreviewScheduler:
+    """Объединение серии событий движения мыши в одну перерисовку предпросмотра.
+
+    schedule() запоминает только последнее событие и ставит перерисовку через
+    after_idle, поэтому пока Tk занят, промежуточные события затирают друг друга.
+    """
+
+    def __init__(self, widget, redraw):
+        self.widget = widget
+        self.redraw = redraw
+        self.pending = None
+        self.after_id = None
+
+    def schedule(self, event):
+        self.pending = event
+        if self.after_id is None:
+            self.after_id = self.widget.after_idle(self._run)
+
+    def _run(self):
+        self.after_id = None
+        event, self.pending = self.pending, None
+        if event is not None:
+            self.redraw(event)
+
+    def flush(self):
+        """Немедленно выполнить отложенную перерисовку, если она есть."""
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self._run()
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+        self.after_id = None
+        self.pending = None
 
 
 class GraphicEditor:
@@ -9,16 +649,28 @@ class GraphicEditor:
         self.root.title("Элементарный графический редактор")
 
         # Создание Canvas для рисования
-        self.canvas = tk.Canvas(self.root, bg="white", width=800, height=600)
+        self.canvas = tk.Canvas(self.root, bg="white", width=CANVAS_WIDTH, height=CANVAS_HEIGHT)
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
+        # Буфер пикселей для растровых алгоритмов, выводится на canvas одним изображением
+        self.framebuffer = Framebuffer()
+        self.photo = tk.PhotoImage(width=CANVAS_WIDTH, height=CANVAS_HEIGHT)
+        self.image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        self.inspector = None
+        self.offset_cache = OffsetCache()
+
         # Переменные
         self.current_shape = tk.StringVar(value="Circle")
+        self.raster_output = tk.BooleanVar(value=True)  # Растровые алгоритмы вместо элементов Tk
+        self.implicit_engine = tk.BooleanVar(value=False)  # Общий алгоритм по неявному уравнению
+        self.rotation = tk.DoubleVar(value=0.0)  # Поворот фигуры в градусах для общего алгоритма
         self.start_x = None
         self.start_y = None
-        self.shapes = []  # Список для хранения нарисованных фигур (хранит id фигур canvas)
+        self.shapes = ShapeStore()  # Нарисованные фигуры: вид, центр и параметры
         self.debug_mode = False  # Переменная для отслеживания состояния отладки
         self.grid_lines = []  # Список для хранения линий сетки
+        self.preview_items = []  # Пары (вид, элемент) предпросмотра, переиспользуемые через coords()
+        self.preview = PreviewScheduler(self.root, self.redraw_preview)
 
         # Создание меню
         self.create_menu()
@@ -38,6 +690,10 @@ class GraphicEditor:
         for shape in ["Circle", "Ellipse", "Hyperbola", "Parabola"]:
             shape_menu.add_radiobutton(label=shape, variable=self.current_shape, value=shape)
 
+        shape_menu.add_separator()
+        shape_menu.add_checkbutton(label="Растровый вывод", variable=self.raster_output)
+        shape_menu.add_checkbutton(label="Общий алгоритм (неявная функция)", variable=self.implicit_engine)
+
         menu_bar.add_cascade(label="Линии второго порядка", menu=shape_menu)
         self.root.config(menu=menu_bar)
 
@@ -48,12 +704,39 @@ class GraphicEditor:
         self.debug_button = ttk.Button(toolbar, text="Включить отладку", command=self.toggle_debug_mode)
         self.debug_button.pack(side=tk.LEFT, padx=5)
 
+        self.inspect_button = ttk.Button(toolbar, text="Просмотр пикселей", command=self.open_inspector,
+                                         state=tk.DISABLED)
+        self.inspect_button.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(toolbar, text="Поворот, °").pack(side=tk.LEFT, padx=(15, 2))
+        ttk.Spinbox(toolbar, from_=-180, to=180, increment=15, width=5,
+                    textvariable=self.rotation).pack(side=tk.LEFT)
+
+    def present(self):
+        self.photo.configure(data=self.framebuffer.to_ppm(), format="PPM")
+        if self.inspector:
+            self.inspector.refresh()
+
+    def open_inspector(self):
+        if self.inspector:
+            self.inspector.window.lift()
+            return
+        self.inspector = PixelInspector(self.root, lambda: self.framebuffer.buffer, on_close=self.close_inspector)
+
+    def close_inspector(self):
+        self.inspector = None
+
     def start_drawing(self, event):
         self.start_x = event.x
         self.start_y = event.y
 
     def draw_shape(self, event):
-        self.canvas.delete("preview")
+        if self.start_x is None or self.start_y is None:
+            return
+        # Перерисовка откладывается до простоя Tk, серия движений мыши дает одну перерисовку
+        self.preview.schedule(event)
+
+    def redraw_preview(self, event):
         if self.start_x is None or self.start_y is None:
             return
 
@@ -61,22 +744,67 @@ class GraphicEditor:
         x0, y0 = self.start_x, self.start_y
         x1, y1 = event.x, event.y
 
-        if shape == "Circle":
+        # Гипербола и парабола показываются ломаными с постоянным числом звеньев,
+        # полное растрирование выполняется только в finish_drawing
+        if self.raster_output.get() and self.implicit_engine.get():
+            center, params = self.raster_parameters(shape, x0, y0, x1, y1)
+            a, b = geometric_params(shape, params)
+            if shape == "Parabola":
+                # Дальше диагонали холста от вершины парабола не видна
+                b = min(b, math.ceil(math.sqrt(2 * a * math.hypot(CANVAS_WIDTH, CANVAS_HEIGHT))) + 1)
+            outline = conic_outline(shape, a, b, self.rotation_angle())
+            figures = [("line", (polyline + center).ravel().tolist()) for polyline in outline]
+
+        elif shape == "Circle":
             radius = math.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2)
-            self.canvas.create_oval(x0 - radius, y0 - radius, x0 + radius, y0 + radius,
-                                    outline="black", tags="preview")
+            figures = [("oval", (x0 - radius, y0 - radius, x0 + radius, y0 + radius))]
 
         elif shape == "Ellipse":
-            self.canvas.create_oval(x0, y0, x1, y1, outline="black", tags="preview")
+            figures = [("oval", (x0, y0, x1, y1))]
 
         elif shape == "Hyperbola":
-            self.draw_hyperbola(x0, y0, x1, y1, preview=True)
+            a, height = max(abs(x1 - x0), 1), max(abs(y1 - y0), 2)
+            figures = [("line", (branch + (x0, y0)).ravel().tolist()) for branch in hyperbola_polylines(a, height / 2)]
 
         elif shape == "Parabola":
-            self.draw_parabola(x0, y0, x1, y1, preview=True)
+            p = max(abs(y1 - y0), 2)
+            width = self.parabola_extent(x0, y0, p, abs(x1 - x0))
+            figures = [("line", (parabola_polyline(p, width) + (x0, y0)).ravel().tolist())]
 
-    def finish_drawing(self, event):
+        else:
+            figures = []
+
+        self.update_preview(figures)
+
+    def update_preview(self, figures):
+        """Перенос существующих элементов предпросмотра через coords(); пересоздаются только несовпадающие по виду.
+
+        figures — список пар (вид элемента "oval" или "line", координаты).
+        """
+        items = []
+        for index, (kind, coords) in enumerate(figures):
+            if index < len(self.preview_items) and self.preview_items[index][0] == kind:
+                item = self.preview_items[index][1]
+                self.canvas.coords(item, *coords)
+            else:
+                if index < len(self.preview_items):
+                    self.canvas.delete(self.preview_items[index][1])
+                if kind == "oval":
+                    item = self.canvas.create_oval(*coords, outline="black", tags="preview")
+                else:
+                    item = self.canvas.create_line(*coords, fill="black", tags="preview")
+            items.append((kind, item))
+        for _, item in self.preview_items[len(figures):]:
+            self.canvas.delete(item)
+        self.preview_items = items
+
+    def clear_preview(self):
+        self.preview.cancel()
         self.canvas.delete("preview")
+        self.preview_items = []
+
+    def finish_drawing(self, event):
+        self.clear_preview()
         if self.start_x is None or self.start_y is None:
             return
 
@@ -85,55 +813,133 @@ class GraphicEditor:
         x1, y1 = event.x, event.y
 
         shape_ids = []
+        if self.raster_output.get():
+            center, params = self.raster_parameters(shape, x0, y0, x1, y1)
+            geometry = geometric_params(shape, params)
+            angle = 0.0
+            if self.implicit_engine.get():
+                angle = self.rotation_angle()
+                self.draw_conic_implicit(shape, geometry, center, angle)
+            else:
+                self.draw_conic(shape, params, center)
+            self.shapes.append(shape, center, geometry, raster=True, angle=angle)
+            if self.debug_mode:
+                self.print_shapes_coordinates()
+            return
+
         if shape == "Circle":
             radius = math.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2)
             shape_ids.append(self.canvas.create_oval(x0 - radius, y0 - radius, x0 + radius, y0 + radius,
                                                      outline="black"))
+            center, params = (x0, y0), (radius, radius)
 
         elif shape == "Ellipse":
             shape_ids.append(self.canvas.create_oval(x0, y0, x1, y1, outline="black"))
+            center, params = ((x0 + x1) / 2, (y0 + y1) / 2), (abs(x1 - x0) / 2, abs(y1 - y0) / 2)
 
         elif shape == "Hyperbola":
             shape_ids = self.draw_hyperbola(x0, y0, x1, y1, preview=False)
+            center, params = (x0, y0), (max(abs(x1 - x0), 1), max(abs(y1 - y0) / 2, 1))
 
         elif shape == "Parabola":
             shape_ids = self.draw_parabola(x0, y0, x1, y1, preview=False)
+            center, params = (x0, y0), (max(abs(y1 - y0), 2), abs(x1 - x0))
 
-        self.shapes.append(
-            {"shape_ids": shape_ids, "type": shape, "coords": [self.canvas.coords(shape_id) for shape_id in shape_ids]})
+        self.shapes.append(shape, center, params, raster=False, items=shape_ids)
 
         if self.debug_mode:
             self.print_shapes_coordinates()
 
-    def draw_hyperbola(self, x0, y0, x1, y1, preview):
+    def raster_parameters(self, shape, x0, y0, x1, y1):
+        """Центр и целочисленные параметры кривой, заданной перетаскиванием из (x0, y0) в (x1, y1)."""
+        # Параметры целые, поэтому повторная фигура тех же размеров берется из кэша смещений
+        if shape == "Circle":
+            return (x0, y0), (round(math.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2)),)
+        if shape == "Ellipse":
+            return ((x0 + x1) // 2, (y0 + y1) // 2), (abs(x1 - x0) // 2, abs(y1 - y0) // 2)
+        if shape == "Hyperbola":
+            # Избежание вырожденной гиперболы
+            return (x0, y0), (max(abs(x1 - x0), 1), max(abs(y1 - y0), 2))
+        return (x0, y0), (max(abs(y1 - y0), 2), abs(x1 - x0))
+
+    def rotation_angle(self):
+        try:
+            return float(self.rotation.get())
+        except tk.TclError:  # В поле поворота введено не число
+            return 0.0
+
+    def conic_offsets(self, shape, params):
+        """Смещения пикселей кривой от центра в окне, видимом при любом положении центра на холсте."""
+        x_max, y_max = self.framebuffer.width - 1, self.framebuffer.height - 1
+        if shape == "Circle":
+            offsets = midpoint_circle(*params)
+        elif shape == "Ellipse":
+            offsets = midpoint_ellipse(*params, clip=(-x_max, -y_max, x_max, y_max))
+        elif shape == "Hyperbola":
+            offsets = midpoint_hyperbola(*params, x_max, y_max)
+        else:
+            p, width = params
+            offsets = midpoint_parabola(p, min(width, x_max), y_max)
+        inside = (np.abs(offsets[:, 0]) <= x_max) & (np.abs(offsets[:, 1]) <= y_max)
+        return offsets[inside]
+
+    def draw_conic(self, shape, params, center):
+        """Растрирование кривой алгоритмом средней точки через кэш смещений и вывод одним изображением."""
+        started = time.perf_counter()
+        offsets = self.offset_cache.get((shape, *params), lambda: self.conic_offsets(shape, params))
+        count = self.framebuffer.draw_offsets(offsets, center)
+        self.present()
+        elapsed = time.perf_counter() - started
+        print(f"{shape} (средняя точка): параметры {params}, пикселей {count}, {elapsed * 1000:.2f} мс, "
+              f"кэш: попаданий {self.offset_cache.hits}, промахов {self.offset_cache.misses}")
+
+    def draw_conic_implicit(self, shape, geometry, center, angle):
+        """Растрирование повернутой кривой общим алгоритмом по неявному уравнению."""
+        started = time.perf_counter()
+        a, b = geometry
+        if shape in ("Circle", "Ellipse"):
+            # У вырожденного эллипса функция не меняет знак, поэтому полуоси не меньше 1/2
+            a, b = max(a, 0.5), max(b, 0.5)
+        rect = (-center[0], -center[1], self.framebuffer.width - 1 - center[0], self.framebuffer.height - 1 - center[1])
+        offsets = rasterize_conic(shape, a, b, angle, rect)
+        count = self.framebuffer.draw_pixels(offsets + center)
+        self.present()
+        elapsed = time.perf_counter() - started
+        print(f"{shape} (неявная функция): параметры ({a:g}, {b:g}), поворот {angle:g}°, пикселей {count}, "
+              f"{elapsed * 1000:.2f} мс")
+
+    def parabola_extent(self, x0, y0, p, width):
+        """Полуширина параболы с вершиной (x0, y0), за которой она уходит за холст."""
+        y_visible = max(self.framebuffer.height - 1 - y0, 0)
+        return min(width, max(x0, self.framebuffer.width - 1 - x0), math.isqrt(2 * p * y_visible) + 1)
+
+    def hyperbola_points(self, x0, y0, x1, y1):
+        """Точки обеих ветвей гиперболы с центром (x0, y0)"""
         a = max(abs(x1 - x0), 1)  # Избежание деления на 0
         b = max(abs(y1 - y0) / 2, 1)
-        shape_ids = []
+        points = []
         for x in range(-a, a + 1):
-            try:
-                y = b * math.sqrt(1 + (x / a) ** 2)
-                tag = "preview" if preview else None
-                oval1 = self.canvas.create_oval(x0 + x, y0 + y, x0 + x + 1, y0 + y + 1, outline="black", tags=tag)
-                oval2 = self.canvas.create_oval(x0 + x, y0 - y, x0 + x + 1, y0 - y + 1, outline="black", tags=tag)
-                if not preview:
-                    shape_ids.extend([oval1, oval2])
-            except ValueError:
-                continue
-        return shape_ids
+            y = b * math.sqrt(1 + (x / a) ** 2)
+            points.append((x0 + x, y0 + y))
+            points.append((x0 + x, y0 - y))
+        return points
 
-    def draw_parabola(self, x0, y0, x1, y1, preview):
+    def parabola_points(self, x0, y0, x1, y1):
+        """Точки параболы с вершиной (x0, y0)"""
         p = max(abs(y1 - y0) / 2, 1)  # Избежание деления на 0
-        shape_ids = []
-        for x in range(-abs(x1 - x0), abs(x1 - x0) + 1):
-            try:
-                y = (x ** 2) / (4 * p)
-                tag = "preview" if preview else None
-                oval = self.canvas.create_oval(x0 + x, y0 + y, x0 + x + 1, y0 + y + 1, outline="black", tags=tag)
-                if not preview:
-                    shape_ids.append(oval)
-            except ValueError:
-                continue
-        return shape_ids
+        return [(x0 + x, y0 + (x ** 2) / (4 * p)) for x in range(-abs(x1 - x0), abs(x1 - x0) + 1)]
+
+    def draw_hyperbola(self, x0, y0, x1, y1, preview):
+        tag = "preview" if preview else None
+        shape_ids = [self.canvas.create_oval(x, y, x + 1, y + 1, outline="black", tags=tag)
+                     for x, y in self.hyperbola_points(x0, y0, x1, y1)]
+        return [] if preview else shape_ids
+
+    def draw_parabola(self, x0, y0, x1, y1, preview):
+        tag = "preview" if preview else None
+        shape_ids = [self.canvas.create_oval(x, y, x + 1, y + 1, outline="black", tags=tag)
+                     for x, y in self.parabola_points(x0, y0, x1, y1)]
+        return [] if preview else shape_ids
 
     def toggle_debug_mode(self):
         # Включаем/выключаем отладку
@@ -141,11 +947,15 @@ class GraphicEditor:
 
         if self.debug_mode:
             self.debug_button.config(text="Выключить отладку")
+            self.inspect_button.config(state=tk.NORMAL)
             self.show_grid()  # Показать сетку
             self.print_shapes_coordinates()
         else:
             self.debug_button.config(text="Включить отладку")
+            self.inspect_button.config(state=tk.DISABLED)
             self.hide_grid()  # Скрыть сетку
+            if self.inspector:
+                self.inspector.close()
 
     def show_grid(self):
         """Отображение дискретной сетки"""
@@ -168,13 +978,16 @@ class GraphicEditor:
         self.grid_lines.clear()
 
     def print_shapes_coordinates(self):
-        """Вывод координат всех фигур на консоль"""
+        """Вывод координат всех фигур на консоль из хранилища, по строке на фигуру"""
+        store = self.shapes
         print("--- Координаты фигур ---")
-        for shape_data in self.shapes:
-            print(f"Тип: {shape_data['type']}")
-            for idx, shape_id in enumerate(shape_data["shape_ids"]):
-                coords = self.canvas.coords(shape_id)
-                print(f"  Фигура {idx + 1} ID {shape_id}: {coords}")
+        for idx in range(len(store)):
+            (cx, cy), (first, second) = store.centers[idx], store.params[idx]
+            output = "буфер кадра" if store.raster[idx] else f"элементов canvas {len(store.items[idx])}"
+            if store.angles[idx]:
+                output += f", поворот {store.angles[idx]:g}°"
+            print(f"Фигура {idx + 1}, тип: {SHAPE_TYPES[store.kinds[idx]]}, центр ({cx:g}, {cy:g}), "
+                  f"параметры ({first:g}, {second:g}), {output}")
         print("--- Конец координат ---")
 
 
@@ -0,0 +1,121 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+
+ELLIPSES = [(1, 1), (1, 7), (7, 1), (2, 200), (339, 1), (5, 5), (40, 13), (13, 40), (100, 99), (250, 60)]
+
+
+def as_set(pixels):
+    return {tuple(point) for point in pixels.tolist()}
+
+
+def components(pixels):
+    """Число 8-связных компонент множества пикселей."""
+    points = as_set(pixels)
+    count = 0
+    while points:
+        count += 1
+        stack = [points.pop()]
+        while stack:
+            x, y = stack.pop()
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if (x + dx, y + dy) in points:
+                        points.remove((x + dx, y + dy))
+                        stack.append((x + dx, y + dy))
+    return count
+
+
+def restrict(pixels, clip):
+    xmin, ymin, xmax, ymax = clip
+    return {(x, y) for x, y in as_set(pixels) if xmin <= x <= xmax and ymin <= y <= ymax}
+
+
+class TracerConnectivityTest(unittest.TestCase):
+    def check(self, pixels, expected_components):
+        self.assertEqual(len(pixels), len(as_set(pixels)), "повторяющиеся пиксели")
+        self.assertEqual(components(pixels), expected_components)
+
+    def test_circle(self):
+        for radius in (0, 1, 2, 10, 57, 300):
+            with self.subTest(radius=radius):
+                self.check(main.midpoint_circle(radius), 1)
+
+    def test_ellipse(self):
+        for a, b in ELLIPSES:
+            with self.subTest(a=a, b=b):
+                self.check(main.midpoint_ellipse(a, b), 1)
+
+    def test_hyperbola(self):
+        for a, height in ((1, 2), (5, 40), (40, 5), (100, 100), (300, 17)):
+            with self.subTest(a=a, height=height):
+                self.check(main.midpoint_hyperbola(a, height), 2)
+
+    def test_parabola(self):
+        for p, width in ((1, 30), (5, 100), (100, 40), (300, 300)):
+            with self.subTest(p=p, width=width):
+                self.check(main.midpoint_parabola(p, width), 1)
+
+
+class RotatedConicTest(unittest.TestCase):
+    RECT = (-2000, -2000, 2000, 2000)
+
+    def check(self, shape, a, b, angle, expected_components=1):
+        pixels = main.rasterize_conic(shape, a, b, angle, self.RECT)
+        self.assertEqual(len(pixels), len(as_set(pixels)), "повторяющиеся пиксели")
+        self.assertEqual(components(pixels), expected_components)
+
+    def test_thin_ellipses(self):
+        for a, b, angle in ((339, 1, 0), (2, 200, 0), (192, 1, -15), (7, 395, -90), (172, 6, 165), (41, 10, 105)):
+            with self.subTest(a=a, b=b, angle=angle):
+                self.check("Ellipse", a, b, angle)
+
+    def test_random_ellipses(self):
+        generator = random.Random(0)
+        for _ in range(300):
+            a, b = generator.randint(1, 400), generator.choice((generator.randint(1, 3), generator.randint(1, 400)))
+            angle = generator.randrange(-180, 181, 15)
+            with self.subTest(a=a, b=b, angle=angle):
+                self.check("Ellipse", *generator.sample((a, b), 2), angle)
+
+    def test_rotated_hyperbola_and_parabola(self):
+        for angle in range(-180, 181, 15):
+            with self.subTest(angle=angle):
+                self.check("Hyperbola", 60, 40, angle, 2)
+                self.check("Parabola", 30, 120, angle)
+
+    def test_unrotated_ellipse_matches_midpoint(self):
+        # У тонких вытянутых по вертикали эллипсов трассировщик средней точки около смены
+        # областей выбирает несколько других пикселей, там сравнивается только связность
+        for a, b in [(a, b) for a, b in ELLIPSES if a >= b or a > 2]:
+            with self.subTest(a=a, b=b):
+                pixels = main.rasterize_conic("Ellipse", a, b, 0, self.RECT)
+                self.assertEqual(as_set(pixels), as_set(main.midpoint_ellipse(a, b)))
+
+
+class ClippingTest(unittest.TestCase):
+    def test_ellipse_clip_matches_restricted_output(self):
+        clips = [(-1000, -1000, 1000, 1000), (0, 0, 10, 10), (-30, -5, 15, 200), (35, -100, 300, 100),
+                 (-300, 10, 300, 12), (5, 5, 6, 6), (500, 500, 600, 600), (-249, -59, 249, 59)]
+        for a, b in ELLIPSES:
+            full = main.midpoint_ellipse(a, b)
+            for clip in clips:
+                with self.subTest(a=a, b=b, clip=clip):
+                    self.assertEqual(restrict(main.midpoint_ellipse(a, b, clip), clip), restrict(full, clip))
+
+    def test_hyperbola_and_parabola_limits_cut_the_curve(self):
+        full = main.midpoint_hyperbola(40, 30)
+        limited = main.midpoint_hyperbola(40, 30, x_max=20, y_max=25)
+        self.assertEqual(as_set(limited), {(x, y) for x, y in as_set(full) if abs(x) <= 20 and abs(y) <= 25})
+        full = main.midpoint_parabola(20, 100)
+        limited = main.midpoint_parabola(20, 100, y_max=50)
+        self.assertEqual(as_set(limited), {(x, y) for x, y in as_set(full) if y <= 50})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,43 @@
+import argparse
 import tkinter as tk
 import math
+import random
+import time
+from functools import lru_cache
 from math import pow
 
+import numpy as np
+
+CURVE_SAMPLES = 100  # Точек на сегмент кривой
+FLATNESS_TOLERANCE = 0.25  # Допустимое отклонение ломаной от кривой в пикселях
+MAX_SUBDIVISION_DEPTH = 16
+MAX_BEZIER_SAMPLES = 1000  # Предел точек кривой Безье высокой степени
+HIT_RADIUS = 10  # Радиус захвата контрольной точки курсором в пикселях
+BSPLINE_MODES = ("Замкнутый", "Открытый", "Зажатый")
+WEIGHT_STEP = 1.25  # Множитель веса точки NURBS за один шаг колеса мыши
+
+# Базисные матрицы кубических кривых для строки [t³, t², t, 1]
+CURVE_BASES = {
+    "Эрмит": np.array([
+        [2, -2, 1, 1],
+        [-3, 3, -2, -1],
+        [0, 0, 1, 0],
+        [1, 0, 0, 0],
+    ], dtype=np.float64),
+    "Безье": np.array([
+        [-1, 3, -3, 1],
+        [3, -6, 3, 0],
+        [-3, 3, 0, 0],
+        [1, 0, 0, 0],
+    ], dtype=np.float64),
+    "B-сплайн": np.array([
+        [-1, 3, -3, 1],
+        [3, -6, 3, 0],
+        [-3, 0, 3, 0],
+        [1, 4, 1, 0],
+    ], dtype=np.float64) / 6,
+}
+
 
 def create_matrix(rows, cols, data):
     """Создает матрицу размером rows x cols, заполняя ее данными из data."""
@@ -30,6 +66,475 @@ def my_linspace(start, stop, num):
     return [start + i * step for i in range(num)]
 
 
+@lru_cache(maxsize=None)
+def t_matrix(samples):
+    """Матрица T (samples x 4) из строк [t³, t², t, 1] для равномерных t от 0 до 1, строится один раз."""
+    t = np.linspace(0, 1, samples)
+    matrix = np.column_stack((t ** 3, t ** 2, t, np.ones_like(t)))
+    matrix.flags.writeable = False
+    return matrix
+
+
+@lru_cache(maxsize=None)
+def basis_samples(curve_type, samples):
+    """Произведение T · M для типа кривой: весовые коэффициенты геометрии в каждой точке."""
+    matrix = t_matrix(samples) @ CURVE_BASES[curve_type]
+    matrix.flags.writeable = False
+    return matrix
+
+
+def evaluate_segments(curve_type, geometry, samples=CURVE_SAMPLES):
+    """Точки всех сегментов кривой одним умножением матриц.
+
+    geometry — массив (segments, 4, 2) геометрических векторов сегментов в порядке
+    строк базисной матрицы. Возвращает массив (segments, samples, 2).
+    """
+    return basis_samples(curve_type, samples) @ geometry
+
+
+def matrix_mult_segments(curve_type, geometry, samples=CURVE_SAMPLES):
+    """Прежний способ на списках: matrix_mult и суммы по генераторам для каждого сегмента, для сравнения."""
+    basis = create_matrix(4, 4, CURVE_BASES[curve_type].ravel().tolist())
+    t_vector_data = [[pow(val, 3), pow(val, 2), val, 1] for val in my_linspace(0, 1, samples)]
+    curves = []
+    for segment in np.asarray(geometry).tolist():
+        coefficients = [matrix_mult(basis, create_matrix(4, 1, [point[axis] for point in segment])) for axis in (0, 1)]
+        curves.append([[sum(ti[j] * column[j][0] for j in range(4)) for column in coefficients]
+                       for ti in t_vector_data])
+    return np.array(curves, dtype=np.float64).reshape(len(curves), samples, 2)
+
+
+def forward_difference_segments(curve_type, geometry, samples=CURVE_SAMPLES):
+    """Точки сегментов прямыми разностями: три сложения на точку вместо вычисления полинома.
+
+    Для f(t) = at³ + bt² + ct + d с шагом h = 1 / (samples - 1) начальные разности
+    Δ1 = ah³ + bh² + ch, Δ2 = 6ah³ + 2bh², Δ3 = 6ah³, далее f += Δ1, Δ1 += Δ2,
+    Δ2 += Δ3. Три накопительные суммы вдоль оси отсчетов выполняют эти сложения в том
+    же порядке, что и цикл, сразу для всех сегментов. Погрешность ограничена
+    forward_difference_bound.
+    """
+    if samples < 4:
+        return evaluate_segments(curve_type, geometry, samples)
+    a, b, c, d = (CURVE_BASES[curve_type] @ geometry).transpose(1, 0, 2)
+    h = 1 / (samples - 1)
+    h2, h3 = h * h, h * h * h
+    steps = np.empty((len(geometry), samples, 2))
+    steps[:, 0] = d
+    steps[:, 1] = a * h3 + b * h2 + c * h
+    steps[:, 2] = 6 * a * h3 + 2 * b * h2
+    steps[:, 3:] = (6 * a * h3)[:, None]
+    for start in (2, 1, 0):
+        np.cumsum(steps[:, start:], axis=1, out=steps[:, start:])
+    return steps
+
+
+def forward_difference_bound(curve_type, geometry, samples=CURVE_SAMPLES):
+    """Оценка сверху отклонения прямых разностей от точного полинома, массив (segments, 2).
+
+    При единице округления u = 2⁻⁵³ и S = |a| + |b| + |c| + |d| на [0, 1] ошибка Δ2
+    за k шагов растет до ~6uSh, Δ1 — до ~12uS, а f — до ~13nuS, отсюда запас 16nuS.
+    У прямого вычисления полинома ошибка порядка 4uS, то есть разности теряют
+    примерно log2(4n) бит: для 100 точек и координат до 10⁴ это меньше 10⁻⁹ пикселя.
+    """
+    coefficients = CURVE_BASES[curve_type] @ geometry
+    return 16 * samples * np.finfo(np.float64).eps / 2 * np.abs(coefficients).sum(axis=1)
+
+
+@lru_cache(maxsize=None)
+def to_bezier_matrix(curve_type):
+    """Матрица перехода от геометрии кривой к контрольным точкам Безье того же сегмента: M_B⁻¹ · M."""
+    matrix = np.linalg.solve(CURVE_BASES["Безье"], CURVE_BASES[curve_type])
+    matrix.flags.writeable = False
+    return matrix
+
+
+def adaptive_segments(curve_type, geometry, samples=None, tolerance=FLATNESS_TOLERANCE):
+    """Ломаные сегментов с адаптивным делением пополам по де Кастельжо, список массивов (k, 2).
+
+    Каждый сегмент переводится в контрольные точки Безье и делится, пока
+    16·tolerance² не ограничит сумму max((3P1 - 2P0 - P3)², (3P2 - P0 - 2P3)²) по
+    осям: тогда кривая отклоняется от хорды P0P3 не больше чем на tolerance пикселей.
+    samples не используется: число точек определяется допуском.
+    """
+    limit = 16 * tolerance * tolerance
+    curves = []
+    for segment in (to_bezier_matrix(curve_type) @ geometry).tolist():
+        points = [segment[0]]
+        stack = [(segment, 0)]
+        while stack:
+            ((x0, y0), (x1, y1), (x2, y2), (x3, y3)), depth = stack.pop()
+            ux = max((3 * x1 - 2 * x0 - x3) ** 2, (3 * x2 - x0 - 2 * x3) ** 2)
+            uy = max((3 * y1 - 2 * y0 - y3) ** 2, (3 * y2 - y0 - 2 * y3) ** 2)
+            if ux + uy <= limit or depth >= MAX_SUBDIVISION_DEPTH:
+                points.append([x3, y3])
+                continue
+            # Деление де Кастельжо при t = 1/2
+            ax, ay = (x0 + x1) / 2, (y0 + y1) / 2
+            bx, by = (x1 + x2) / 2, (y1 + y2) / 2
+            cx, cy = (x2 + x3) / 2, (y2 + y3) / 2
+            abx, aby = (ax + bx) / 2, (ay + by) / 2
+            bcx, bcy = (bx + cx) / 2, (by + cy) / 2
+            mx, my = (abx + bcx) / 2, (aby + bcy) / 2
+            stack.append((((mx, my), (bcx, bcy), (cx, cy), (x3, y3)), depth + 1))
+            stack.append((((x0, y0), (ax, ay), (abx, aby), (mx, my)), depth + 1))
+        curves.append(np.array(points))
+    return curves
+
+
+# Способы вычисления точек кривых, переключаются в меню "Вычисление"
+EVALUATORS = {
+    "matrix_mult": matrix_mult_segments,
+    "NumPy": evaluate_segments,
+    "Прямые разности": forward_difference_segments,
+    "Адаптивное деление": adaptive_segments,
+}
+
+
+def hermite_geometry(points):
+    """Геометрия [P1, P4, R1, R4] кривой Эрмита по последним четырем точкам (x, y)."""
+    p0, p1, q0, q1 = np.asarray(points[-4:], dtype=np.float64)
+    return np.array([[p0, p1, q0 - p0, q1 - p1]])
+
+
+def bezier_geometry(points):
+    """Геометрия кривой Безье по последним четырем точкам, заданным в порядке P0, P3, P1, P2."""
+    p0, p3, p1, p2 = np.asarray(points[-4:], dtype=np.float64)
+    return np.array([[p0, p1, p2, p3]])
+
+
+def bspline_geometry(points):
+    """Геометрия всех сегментов замкнутого B-сплайна: окна по четыре точки, (segments, 4, 2)."""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) >= 3:
+        points = np.concatenate((points, points[:3]))
+    if len(points) < 4:
+        return np.empty((0, 4, 2))
+    return np.lib.stride_tricks.sliding_window_view(points, 4, axis=0).transpose(0, 2, 1)
+
+
+def bezier_control(points):
+    """Контрольный многоугольник P0..Pn кривой Безье по точкам, заданным в порядке P0, Pn, P1, ..., Pn-1.
+
+    Для четырех точек это прежний порядок P0, P3, P1, P2.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return points
+    return np.concatenate((points[:1], points[2:], points[1:2]))
+
+
+def bezier_entry_order(control):
+    """Обратное к bezier_control: порядок P0, Pn, P1, ..., Pn-1, в котором точки хранятся в редакторе."""
+    control = np.asarray(control, dtype=np.float64)
+    if len(control) < 3:
+        return control
+    return np.concatenate((control[:1], control[-1:], control[1:-1]))
+
+
+# При перетаскивании используется только текущая степень, а каждая новая точка повышает
+# степень: неограниченный кэш копил бы по матрице до 1000 x (n + 1) на каждую точку
+@lru_cache(maxsize=4)
+def bernstein_matrix(degree, samples):
+    """Матрица (samples x degree + 1) базисных полиномов Бернштейна B_i,n(t) для равномерных t.
+
+    Значения C(n, i)·tⁱ·(1 - t)ⁿ⁻ⁱ считаются через логарифмы: биномиальные
+    коэффициенты высоких степеней переполняют float64, а степени t уходят в ноль.
+    Относительная ошибка каждого значения порядка u·n·log n, поэтому точки
+    кривой остаются выпуклыми комбинациями контрольных точек при любой степени.
+    """
+    t = np.linspace(0, 1, samples)[:, None]
+    i = np.arange(degree + 1)
+    log_factorials = np.array([math.lgamma(k + 1) for k in range(degree + 1)])
+    log_binomials = log_factorials[-1] - log_factorials - log_factorials[::-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        powers = np.where(i > 0, i * np.log(t), 0) + np.where(i < degree, (degree - i) * np.log1p(-t), 0)
+    matrix = np.exp(log_binomials + powers)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def bezier_points(control, samples=CURVE_SAMPLES):
+    """Точки кривой Безье любой степени одним умножением на матрицу Бернштейна, массив (samples, 2)."""
+    control = np.asarray(control, dtype=np.float64)
+    return bernstein_matrix(len(control) - 1, samples) @ control
+
+
+def de_casteljau(control, t):
+    """Точки кривой Безье при параметрах t по схеме де Кастельжо, сразу для всех t.
+
+    Каждый уровень заменяет соседние точки их линейной интерполяцией, что дает
+    наилучшую устойчивость, но требует O(n²) операций на параметр: это
+    эталон для bezier_points и основа деления кривой.
+    """
+    t = np.asarray(t, dtype=np.float64)[:, None, None]
+    points = np.repeat(np.asarray(control, dtype=np.float64)[None], len(t), axis=0)
+    for count in range(len(control) - 1, 0, -1):
+        points[:, :count] = (1 - t) * points[:, :count] + t * points[:, 1:count + 1]
+    return points[:, 0]
+
+
+def split_bezier(control, t=0.5):
+    """Деление кривой Безье в точке t на две кривой той же степени: левый и правый многоугольники.
+
+    Левые контрольные точки — первые точки уровней схемы де Кастельжо, правые —
+    последние в обратном порядке.
+    """
+    points = np.array(control, dtype=np.float64)
+    left, right = [points[0]], [points[-1]]
+    for count in range(len(points) - 1, 0, -1):
+        points = (1 - t) * points[:-1] + t * points[1:]
+        left.append(points[0])
+        right.append(points[-1])
+    return np.array(left), np.array(right[::-1])
+
+
+def elevate_bezier(control):
+    """Повышение степени на 1 без изменения кривой: Qi = i/(n+1)·Pi-1 + (1 - i/(n+1))·Pi."""
+    control = np.asarray(control, dtype=np.float64)
+    alpha = (np.arange(1, len(control)) / len(control))[:, None]
+    return np.concatenate((control[:1], alpha * control[:-1] + (1 - alpha) * control[1:], control[-1:]))
+
+
+def adaptive_bezier(control, tolerance=FLATNESS_TOLERANCE):
+    """Ломаная кривой Безье любой степени с адаптивным делением пополам, массив (k, 2).
+
+    Кривая лежит в выпуклой оболочке контрольных точек, поэтому если все они
+    ближе tolerance к хорде P0Pn, то и кривая отклоняется от хорды не больше.
+    """
+    points = [np.asarray(control, dtype=np.float64)[0]]
+    stack = [(np.asarray(control, dtype=np.float64), 0)]
+    while stack:
+        polygon, depth = stack.pop()
+        chord = polygon[-1] - polygon[0]
+        offsets = polygon[1:-1] - polygon[0]
+        length = chord @ chord
+        t = np.clip(offsets @ chord / length, 0, 1) if length else np.zeros(len(offsets))
+        deviation = offsets - t[:, None] * chord
+        if depth >= MAX_SUBDIVISION_DEPTH or not len(offsets) or \
+                (deviation * deviation).sum(axis=1).max() <= tolerance * tolerance:
+            points.append(polygon[-1])
+            continue
+        left, right = split_bezier(polygon)
+        stack.append((right, depth + 1))
+        stack.append((left, depth + 1))
+    return np.array(points)
+
+
+def bezier_samples(degree):
+    """Число точек кривой Безье степени degree: CURVE_SAMPLES на каждые три степени, не больше MAX_BEZIER_SAMPLES."""
+    return min(CURVE_SAMPLES * max(1, degree // 3), MAX_BEZIER_SAMPLES)
+
+
+def bspline_knots(count, degree, mode):
+    """Узловой вектор для count контрольных точек (у замкнутого сплайна — уже с повторенными).
+
+    У зажатого сплайна крайние узлы повторяются degree + 1 раз и кривая проходит
+    через первую и последнюю точки, у открытого и замкнутого узлы равномерные.
+    """
+    if mode == "Зажатый":
+        return np.concatenate((np.zeros(degree), np.linspace(0, 1, count - degree + 1), np.ones(degree)))
+    return np.arange(count + degree + 1, dtype=np.float64)
+
+
+def de_boor(control, knots, degree, u):
+    """Точки B-сплайна степени degree при параметрах u по схеме де Бора, сразу для всех u.
+
+    Интервалы узлов всех параметров находятся одним searchsorted, затем degree
+    уровней линейных интерполяций выполняются над массивом (len(u), degree + 1, dim).
+    control — массив (count, dim), для NURBS — в однородных координатах.
+    """
+    control = np.asarray(control, dtype=np.float64)
+    knots = np.asarray(knots, dtype=np.float64)
+    count = len(control)
+    if len(knots) != count + degree + 1:
+        raise ValueError("Число узлов должно быть на degree + 1 больше числа контрольных точек")
+    u = np.clip(np.asarray(u, dtype=np.float64), knots[degree], knots[count])
+    span = np.clip(np.searchsorted(knots, u, side="right") - 1, degree, count - 1)
+    offsets = np.arange(degree + 1)
+    points = control[span[:, None] - degree + offsets]
+    for level in range(1, degree + 1):
+        first = span[:, None] - degree + offsets[level:]
+        left, right = knots[first], knots[first + degree - level + 1]
+        alpha = ((u[:, None] - left) / (right - left))[..., None]
+        points[:, level:] = (1 - alpha) * points[:, level - 1:-1] + alpha * points[:, level:]
+    return points[:, degree]
+
+
+@lru_cache(maxsize=None)
+def span_fit_matrix(degree):
+    """Узлы внутри интервала и обратная матрица Вандермонда для восстановления полинома степени degree по ним."""
+    nodes = (np.arange(degree + 1) + 0.5) / (degree + 1)
+    matrix = np.linalg.inv(np.vander(nodes))
+    nodes.flags.writeable = matrix.flags.writeable = False
+    return nodes, matrix
+
+
+@lru_cache(maxsize=None)
+def power_samples(degree, samples):
+    """Матрица (samples x degree + 1) из строк [tⁿ, ..., t, 1] для равномерных t от 0 до 1."""
+    matrix = np.vander(np.linspace(0, 1, samples), degree + 1)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def bspline_segments(points, degree=3, mode="Замкнутый", weights=None, samples=CURVE_SAMPLES, knots=None):
+    """Точки B-сплайна по непустым интервалам узлов, массив (spans, samples, 2).
+
+    Замкнутый сплайн повторяет первые degree точек в конце, у открытого и
+    зажатого степень понижается до числа точек минус 1. knots задает
+    произвольный узловой вектор вместо построенного по mode. На каждом интервале
+    сплайн — полином степени degree, поэтому de_boor вычисляет только degree + 1
+    точек внутри интервалов, а остальные получаются, как у кубических кривых,
+    умножением строк степеней t на коэффициенты полиномов. При заданных весах
+    строится NURBS: так вычисляются точки (wx, wy, w), которые затем делятся на w.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[:, None]
+        points = np.hstack((points * weights, weights))
+    if mode == "Замкнутый":
+        points = points[np.arange(len(points) + degree) % len(points)]
+    else:
+        degree = min(degree, len(points) - 1)
+    if knots is None:
+        knots = bspline_knots(len(points), degree, mode)
+    knots = np.asarray(knots, dtype=np.float64)
+    starts, ends = knots[degree:len(points)], knots[degree + 1:len(points) + 1]
+    nonempty = ends > starts
+    nodes, fit = span_fit_matrix(degree)
+    u = starts[nonempty, None] + nodes * (ends - starts)[nonempty, None]
+    values = de_boor(points, knots, degree, u.ravel()).reshape(len(u), degree + 1, -1)
+    curves = power_samples(degree, samples) @ (fit @ values)
+    if weights is not None:
+        curves = curves[..., :2] / curves[..., 2:]
+    return curves
+
+
+def benchmark_evaluators(segments=50, sample_counts=(10, 100, 1000), repeat=5):
+    """Сравнение времени способов вычисления на замкнутом B-сплайне со случайными точками."""
+    rng = random.Random(0)
+    points = [(rng.uniform(0, 1000), rng.uniform(0, 700)) for _ in range(segments)]
+    geometry = bspline_geometry(points)
+    for samples in sample_counts:
+        reference = evaluate_segments("B-сплайн", geometry, samples)
+        bound = forward_difference_bound("B-сплайн", geometry, samples).max()
+        print(f"Сегментов {len(geometry)}, точек на сегмент {samples}:")
+        for name, evaluate in EVALUATORS.items():
+            best = math.inf
+            for _ in range(repeat):
+                started = time.perf_counter()
+                curves = evaluate("B-сплайн", geometry, samples)
+                best = min(best, time.perf_counter() - started)
+            if isinstance(curves, list):
+                lines = sum(len(curve) - 1 for curve in curves)
+                print(f"  {name:18} {best * 1000:9.3f} мс, отрезков {lines} при допуске {FLATNESS_TOLERANCE} пикс.")
+                continue
+            deviation = np.abs(curves - reference).max()
+            print(f"  {name:18} {best * 1000:9.3f} мс, отклонение от NumPy {deviation:.2e}")
+        print(f"  Оценка погрешности прямых разностей {bound:.2e}")
+
+
+def benchmark_bezier(degrees=(3, 30, 300), samples=1000, repeat=5):
+    """Сравнение матрицы Бернштейна со схемой де Кастельжо на кривых Безье разных степеней."""
+    rng = random.Random(0)
+    t = np.linspace(0, 1, samples)
+    for degree in degrees:
+        control = np.array([(rng.uniform(0, 1000), rng.uniform(0, 700)) for _ in range(degree + 1)])
+        timings = {}
+        for name, evaluate in (("Бернштейн", lambda: bezier_points(control, samples)),
+                               ("де Кастельжо", lambda: de_casteljau(control, t))):
+            best = math.inf
+            for _ in range(repeat):
+                started = time.perf_counter()
+                curve = evaluate()
+                best = min(best, time.perf_counter() - started)
+            timings[name] = (best, curve)
+        deviation = np.abs(timings["Бернштейн"][1] - timings["де Кастельжо"][1]).max()
+        print(f"Безье степени {degree}, точек {samples}: " +
+              ", ".join(f"{name} {best * 1000:.3f} мс" for name, (best, _) in timings.items()) +
+              f", расхождение {deviation:.2e}")
+        if degree == 3:
+            cubic = evaluate_segments("Безье", control[None], samples)[0]
+            print(f"  Отклонение от кубического сегмента {np.abs(timings['Бернштейн'][1] - cubic).max():.2e}")
+
+
+def benchmark_bspline(point_counts=(100, 1000), samples=CURVE_SAMPLES, repeat=5):
+    """Время схемы де Бора на длинных сплайнах разных степеней и режимов, в том числе NURBS."""
+    rng = random.Random(0)
+    for count in point_counts:
+        points = np.array([(rng.uniform(0, 1000), rng.uniform(0, 700)) for _ in range(count)])
+        weights = np.array([rng.uniform(0.5, 2) for _ in range(count)])
+        reference = evaluate_segments("B-сплайн", bspline_geometry(points), samples)
+        print(f"B-сплайн из {count} точек, {samples} точек на интервал:")
+        for degree, mode, curve_weights in ((3, "Замкнутый", None), (3, "Зажатый", None),
+                                            (5, "Открытый", None), (5, "Зажатый", weights)):
+            best = math.inf
+            for _ in range(repeat):
+                started = time.perf_counter()
+                curves = bspline_segments(points, degree, mode, curve_weights, samples)
+                best = min(best, time.perf_counter() - started)
+            line = f"  степень {degree}, {mode.lower():9} {'NURBS' if curve_weights is not None else '':5} " \
+                   f"{best * 1000:9.3f} мс, точек {curves.shape[0] * curves.shape[1]}"
+            if degree == 3 and mode == "Замкнутый":
+                line += f", отклонение от матричного вычисления {np.abs(curves - reference).max():.2e}"
+            print(line)
+
+
+class SpatialHash:
+    """Равномерная сетка для поиска точек рядом с курсором.
+
+    Ячейки размера cell_size хранят ключи точек. Поиск в радиусе не больше
+    cell_size просматривает только 3x3 соседние ячейки и сравнивает квадраты
+    расстояний, поэтому не зависит от общего числа точек.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}  # (столбец, строка) -> множество ключей
+        self.positions = {}  # ключ -> (x, y)
+
+    def cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, key, x, y):
+        self.positions[key] = (x, y)
+        self.cells.setdefault(self.cell(x, y), set()).add(key)
+
+    def remove(self, key):
+        cell = self.cell(*self.positions.pop(key))
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+
+    def move(self, key, x, y):
+        if self.cell(*self.positions[key]) == self.cell(x, y):
+            self.positions[key] = (x, y)
+        else:
+            self.remove(key)
+            self.insert(key, x, y)
+
+    def nearest(self, x, y, radius):
+        """Ключ ближайшей точки на расстоянии меньше radius (при равенстве — меньший ключ) или None."""
+        if radius > self.cell_size:
+            raise ValueError("Радиус поиска больше размера ячейки")
+        col, row = self.cell(x, y)
+        best_key, best_distance = None, radius * radius
+        for dc in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                for key in self.cells.get((col + dc, row + dr), ()):
+                    px, py = self.positions[key]
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance < best_distance or (distance == best_distance
+                                                    and best_key is not None and key < best_key):
+                        best_key, best_distance = key, distance
+        return best_key
+
+    def clear(self):
+        self.cells.clear()
+        self.positions.clear()
+
+
 class Point:
     def __init__(self, x, y):
         self.x = x
@@ -42,6 +547,7 @@ class ControlPoint:
         self.y = y
         self.radius = radius
         self.color = color
+        self.weight = 1.0  # Вес точки в NURBS
         self.oval = None  # id созданного объекта на канве
 
     def draw(self, canvas):
@@ -53,6 +559,43 @@ class ControlPoint:
             self.oval = canvas.create_oval(x1, y1, x2, y2, fill=self.color)
 
 
+class PreviewScheduler:
+    """Объединение серии событий движения мыши в одну перерисовку предпросмотра.
+
+    schedule() запоминает только последнее событие и ставит перерисовку через
+    after_idle, поэтому пока Tk занят, промежуточные события затирают друг друга.
+    """
+
+    def __init__(self, widget, redraw):
+        self.widget = widget
+        self.redraw = redraw
+        self.pending = None
+        self.after_id = None
+
+    def schedule(self, event):
+        self.pending = event
+        if self.after_id is None:
+            self.after_id = self.widget.after_idle(self._run)
+
+    def _run(self):
+        self.after_id = None
+        event, self.pending = self.pending, None
+        if event is not None:
+            self.redraw(event)
+
+    def flush(self):
+        """Немедленно выполнить отложенную перерисовку, если она есть."""
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self._run()
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+        self.after_id = None
+        self.pending = None
+
+
 class CurveEditor(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -62,10 +605,18 @@ class CurveEditor(tk.Tk):
 
         self.points = []  # Теперь список объектов ControlPoint
         self.current_curve_type = "Эрмит"
-        self.curve_lines = []
+        self.evaluator = "NumPy"  # Ключ EVALUATORS
+        self.last_report = None  # Статистика последней перерисовки кривой
+        self.curve_lines = []  # id ломаных canvas по сегментам кривой
+        self.drawn_curve_type = None  # Тип кривой, которой принадлежат curve_lines
         self.selected_point = None
+        self.selected_index = None
+        self.point_index = SpatialHash(HIT_RADIUS)  # Индексы точек в сетке для поиска под курсором
         self.is_dragging = False
         self.point_limit_reached = False  # Добавляем флаг ограничения
+        self.bspline_degree = tk.IntVar(value=3)
+        self.bspline_mode = tk.StringVar(value="Замкнутый")
+        self.drag_preview = PreviewScheduler(self, self.apply_drag)
 
         self.create_menu()
         self.create_canvas()
@@ -80,7 +631,23 @@ class CurveEditor(tk.Tk):
         curvemenu.add_command(label="Эрмит", command=lambda: self.set_curve_type("Эрмит"))
         curvemenu.add_command(label="Безье", command=lambda: self.set_curve_type("Безье"))
         curvemenu.add_command(label="B-сплайн", command=lambda: self.set_curve_type("B-сплайн"))
+        curvemenu.add_separator()
+        curvemenu.add_command(label="Повысить степень Безье", command=self.elevate_bezier_degree)
+        degreemenu = tk.Menu(curvemenu, tearoff=0)
+        for degree in range(1, 6):
+            degreemenu.add_radiobutton(label=str(degree), variable=self.bspline_degree, value=degree,
+                                       command=self.draw_curve)
+        curvemenu.add_cascade(label="Степень B-сплайна", menu=degreemenu)
+        modemenu = tk.Menu(curvemenu, tearoff=0)
+        for mode in BSPLINE_MODES:
+            modemenu.add_radiobutton(label=mode, variable=self.bspline_mode, value=mode, command=self.draw_curve)
+        curvemenu.add_cascade(label="Узлы B-сплайна", menu=modemenu)
         menubar.add_cascade(label="Кривые", menu=curvemenu)
+
+        evalmenu = tk.Menu(menubar, tearoff=0)
+        for name in EVALUATORS:
+            evalmenu.add_command(label=name, command=lambda name=name: self.set_evaluator(name))
+        menubar.add_cascade(label="Вычисление", menu=evalmenu)
         self.config(menu=menubar)
 
     def create_canvas(self):
@@ -89,16 +656,28 @@ class CurveEditor(tk.Tk):
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
+        # Колесо мыши над точкой меняет ее вес: <MouseWheel> в Windows и macOS, <Button-4/5> в X11
+        self.canvas.bind("<MouseWheel>", self.on_canvas_wheel)
+        self.canvas.bind("<Button-4>", self.on_canvas_wheel)
+        self.canvas.bind("<Button-5>", self.on_canvas_wheel)
 
     def set_curve_type(self, curve_type):
         self.current_curve_type = curve_type
         print(f"Выбран тип кривой: {curve_type}")
         self.point_limit_reached = False  # Сбрасываем флаг при смене типа кривой
 
+    def set_evaluator(self, name):
+        self.evaluator = name
+        print(f"Способ вычисления кривых: {name}")
+        self.draw_curve()
+
     def clear_canvas(self):
+        self.drag_preview.cancel()
         self.points = []
+        self.point_index.clear()
         self.canvas.delete("all")
         self.curve_lines = []
+        self.drawn_curve_type = None
         self.selected_point = None
         self.point_limit_reached = False  # Сбрасываем флаг при очистке
         print("Очистка полотна")
@@ -106,181 +685,223 @@ class CurveEditor(tk.Tk):
     def on_canvas_click(self, event):
         x, y = event.x, event.y
 
-        if self.current_curve_type in ("Эрмит", "Безье") and len(self.points) >= 4:
+        if self.current_curve_type == "Эрмит" and len(self.points) >= 4:
             self.point_limit_reached = True  # Устанавливаем флаг, что больше точек не надо
 
         if self.point_limit_reached:
-            # Для Безье и Эрмита больше 4 точек не добавится
-            clicked_point = self.find_point_near(x, y)
-            if clicked_point:
-                self.selected_point = clicked_point
+            # Для Эрмита больше 4 точек не добавится
+            clicked_index = self.find_point_near(x, y)
+            if clicked_index is not None:
+                self.selected_point = self.points[clicked_index]
+                self.selected_index = clicked_index
                 self.is_dragging = True
             else:
                 self.selected_point = None
         else:
-            clicked_point = self.find_point_near(x, y)
-            if clicked_point:
-                self.selected_point = clicked_point
+            clicked_index = self.find_point_near(x, y)
+            if clicked_index is not None:
+                self.selected_point = self.points[clicked_index]
+                self.selected_index = clicked_index
                 self.is_dragging = True
             else:
                 self.selected_point = None
                 point = ControlPoint(x, y)
                 self.points.append(point)
+                self.point_index.insert(len(self.points) - 1, x, y)
                 point.draw(self.canvas)
 
                 if len(self.points) > 1:
                     self.draw_curve()
 
     def on_canvas_drag(self, event):
+        if self.selected_point and self.is_dragging:
+            # Кривая перестраивается один раз на серию событий движения, а не на каждое событие
+            self.drag_preview.schedule(event)
+
+    def apply_drag(self, event):
         if self.selected_point and self.is_dragging:
             self.selected_point.x = event.x
             self.selected_point.y = event.y
+            self.point_index.move(self.selected_index, event.x, event.y)
             self.selected_point.draw(self.canvas)
-            self.draw_curve()
+            if self.current_curve_type == "B-сплайн" and self.uniform_cubic_bspline() and \
+                    len(self.curve_lines) == len(self.points) >= 3:
+                self.redraw_bspline_segments(self.selected_index)
+            else:
+                self.draw_curve()
 
     def on_canvas_release(self, event):
+        self.drag_preview.flush()
+        if self.is_dragging:
+            self.print_report()
         self.is_dragging = False
         self.selected_point = None
+        self.selected_index = None
 
-    def find_point_near(self, x, y, threshold=10):
-        for point in self.points:
-            distance = math.sqrt((x - point.x) ** 2 + (y - point.y) ** 2)
-            if distance < threshold:
-                return point
-        return None
+    def on_canvas_wheel(self, event):
+        index = self.find_point_near(event.x, event.y)
+        if index is None:
+            return
+        point = self.points[index]
+        point.weight *= WEIGHT_STEP if event.num == 4 or event.delta > 0 else 1 / WEIGHT_STEP
+        print(f"Вес точки {index}: {point.weight:.3f}")
+        if self.current_curve_type == "B-сплайн":
+            self.draw_curve()
+
+    def find_point_near(self, x, y, threshold=HIT_RADIUS):
+        # Индекс ближайшей контрольной точки ближе threshold или None
+        return self.point_index.nearest(x, y, threshold)
 
     def draw_curve(self):
-        # Очищаем предыдущие линии кривых
-        for line in self.curve_lines:
-            self.canvas.delete(line)
-        self.curve_lines = []
+        # Ломаные кривой того же типа переиспользуются, иначе удаляются
+        if self.drawn_curve_type != self.current_curve_type:
+            for line in self.curve_lines:
+                self.canvas.delete(line)
+            self.curve_lines = []
+            self.drawn_curve_type = self.current_curve_type
 
         if self.current_curve_type == "Эрмит":
             if len(self.points) >= 4:
                 self.draw_hermite_curve()
         elif self.current_curve_type == "Безье":
-            if len(self.points) >= 4:  # Теперь нужно 4 точки
+            if len(self.points) >= 2:  # Степень кривой на 1 меньше числа точек
                 self.draw_bezier_curve()
         elif self.current_curve_type == "B-сплайн":
             if len(self.points) >= 2:
                 self.draw_bspline_curve()
 
+    def print_report(self):
+        if self.last_report:
+            curve_type, segments, lines, elapsed = self.last_report
+            print(f"{curve_type} ({self.evaluator}): сегментов {segments}, отрезков {lines}, "
+                  f"вычисление {elapsed * 1000:.2f} мс")
+
+    def control_coords(self):
+        return [(point.x, point.y) for point in self.points]
+
     def draw_hermite_curve(self):
         """Рисует кривую Эрмита для последних четырех точек."""
         if len(self.points) < 4:
             return
-
-        p0 = [self.points[-4].x, self.points[-4].y]
-        p1 = [self.points[-3].x, self.points[-3].y]
-        r0 = [self.points[-2].x - p0[0], self.points[-2].y - p0[1]]
-        r1 = [self.points[-1].x - p1[0], self.points[-1].y - p1[1]]
-
-        t = my_linspace(0, 1, 100)
-
-        # Матрица Эрмита
-        m_hermite = create_matrix(4, 4, [
-            2, -2, 1, 1,
-            -3, 3, -2, -1,
-            0, 0, 1, 0,
-            1, 0, 0, 0
-        ])
-
-        # Формирование матрицы параметров t
-        t_vector_data = [[pow(val, 3), pow(val, 2), val, 1] for val in t]
-
-        # Вычисление значений кривой
-        hermite_x = matrix_mult(m_hermite, create_matrix(4, 1, [p0[0], p1[0], r0[0], r1[0]]))
-        hermite_y = matrix_mult(m_hermite, create_matrix(4, 1, [p0[1], p1[1], r0[1], r1[1]]))
-
-        curve_x = [sum(ti[j] * hermite_x[j][0] for j in range(4)) for ti in t_vector_data]
-        curve_y = [sum(ti[j] * hermite_y[j][0] for j in range(4)) for ti in t_vector_data]
-
-        # Рисование кривой
-        for i in range(len(curve_x) - 1):
-            x1, y1 = curve_x[i], curve_y[i]
-            x2, y2 = curve_x[i + 1], curve_y[i + 1]
-            line = self.canvas.create_line(x1, y1, x2, y2, fill="blue")
-            self.curve_lines.append(line)
+        self.curve_lines = self.draw_segments("Эрмит", hermite_geometry(self.control_coords()), "blue",
+                                             self.curve_lines)
 
     def draw_bezier_curve(self):
-        """Рисует кривую Безье для последних четырех точек."""
-        if len(self.points) < 4:
-            return
-
-        p0 = [self.points[-4].x, self.points[-4].y]
-        p3 = [self.points[-3].x, self.points[-3].y]
-        p1 = [self.points[-2].x, self.points[-2].y]
-        p2 = [self.points[-1].x, self.points[-1].y]
-
-        t = my_linspace(0, 1, 100)
-
-        m_bezier = create_matrix(4, 4, [
-            -1, 3, -3, 1,
-            3, -6, 3, 0,
-            -3, 3, 0, 0,
-            1, 0, 0, 0
-        ])
+        """Рисует кривую Безье по всем точкам, заданным в порядке P0, Pn, P1, ..., Pn-1.
 
-        t_vector_data = [[pow(val, 3), pow(val, 2), val, 1] for val in t]
-
-        bezier_x = matrix_mult(m_bezier, create_matrix(4, 1, [p0[0], p1[0], p2[0], p3[0]]))
-        bezier_y = matrix_mult(m_bezier, create_matrix(4, 1, [p0[1], p1[1], p2[1], p3[1]]))
-
-        curve_x = [sum(ti[j] * bezier_x[j][0] for j in range(4)) for ti in t_vector_data]
-        curve_y = [sum(ti[j] * bezier_y[j][0] for j in range(4)) for ti in t_vector_data]
-
-        for i in range(len(curve_x) - 1):
-            x1, y1 = curve_x[i], curve_y[i]
-            x2, y2 = curve_x[i + 1], curve_y[i + 1]
-            line = self.canvas.create_line(x1, y1, x2, y2, fill="green")
-            self.curve_lines.append(line)
-
-    def draw_bspline_curve(self):
+        Четыре точки дают прежний кубический сегмент со всеми способами вычисления.
+        Кривые другой степени строятся матрицей Бернштейна, а в режиме адаптивного
+        деления — делением де Кастельжо.
+        """
         if len(self.points) < 2:
             return
-
-        points = [[point.x, point.y] for point in self.points]
-        n = len(points) - 1
-
-        if len(points) >= 3:
-            extended_points = points + [points[0], points[1], points[2]]
+        if len(self.points) == 4:
+            self.curve_lines = self.draw_segments("Безье", bezier_geometry(self.control_coords()), "green",
+                                                 self.curve_lines)
+            return
+        control = bezier_control(self.control_coords())
+        started = time.perf_counter()
+        if self.evaluator == "Адаптивное деление":
+            curve = adaptive_bezier(control)
         else:
-            extended_points = points
-
-        all_curve_segments = []
-        for i in range(len(extended_points) - 3):
-            p0 = extended_points[i]
-            p1 = extended_points[i + 1]
-            p2 = extended_points[i + 2]
-            p3 = extended_points[i + 3]
-
-            t = my_linspace(0, 1, 100)
-
-            m_bspline = create_matrix(4, 4, [
-                -1 / 6, 3 / 6, -3 / 6, 1 / 6,
-                3 / 6, -6 / 6, 3 / 6, 0,
-                -3 / 6, 0, 3 / 6, 0,
-                1 / 6, 4 / 6, 1 / 6, 0
-            ])
+            curve = bezier_points(control, bezier_samples(len(control) - 1))
+        self.curve_lines = self.show_curves("Безье", [curve], time.perf_counter() - started, "green",
+                                            self.curve_lines)
 
-            t_vector_data = [[pow(val, 3), pow(val, 2), val, 1] for val in t]
-
-            bspline_x = matrix_mult(m_bspline, create_matrix(4, 1, [p0[0], p1[0], p2[0], p3[0]]))
-            bspline_y = matrix_mult(m_bspline, create_matrix(4, 1, [p0[1], p1[1], p2[1], p3[1]]))
-
-            curve_x = [sum(ti[j] * bspline_x[j][0] for j in range(4)) for ti in t_vector_data]
-            curve_y = [sum(ti[j] * bspline_y[j][0] for j in range(4)) for ti in t_vector_data]
+    def elevate_bezier_degree(self):
+        """Заменяет контрольные точки кривой Безье на точки кривой степени на 1 выше; кривая не меняется."""
+        if self.current_curve_type != "Безье" or len(self.points) < 2:
+            return
+        control = elevate_bezier(bezier_control(self.control_coords()))
+        for point in self.points:
+            self.canvas.delete(point.oval)
+        self.points = []
+        self.point_index.clear()
+        for index, (x, y) in enumerate(bezier_entry_order(control).tolist()):
+            point = ControlPoint(x, y)
+            self.points.append(point)
+            self.point_index.insert(index, x, y)
+            point.draw(self.canvas)
+        print(f"Степень кривой Безье: {len(self.points) - 1}")
+        self.draw_curve()
+
+    def uniform_cubic_bspline(self):
+        """Замкнутый равномерный кубический сплайн без весов, который строится базисной матрицей."""
+        return self.bspline_degree.get() == 3 and self.bspline_mode.get() == "Замкнутый" and \
+            all(point.weight == 1 for point in self.points)
 
-            all_curve_segments.append(list(zip(curve_x, curve_y)))
+    def draw_bspline_curve(self):
+        """Рисует B-сплайн выбранной степени и режима узлов, по ломаной на интервал узлов.
 
-        for curve in all_curve_segments:
-            for i in range(len(curve) - 1):
-                x1, y1 = curve[i][0], curve[i][1]
-                x2, y2 = curve[i + 1][0], curve[i + 1][1]
-                line = self.canvas.create_line(x1, y1, x2, y2, fill="magenta")
-                self.curve_lines.append(line)
+        Замкнутый кубический сплайн без весов вычисляется одним умножением матриц
+        выбранным способом, остальные — схемой де Бора, с весами — как NURBS.
+        """
+        if len(self.points) < 2:
+            return
+        if self.uniform_cubic_bspline():
+            self.curve_lines = self.draw_segments("B-сплайн", bspline_geometry(self.control_coords()), "magenta",
+                                                 self.curve_lines)
+            return
+        weights = [point.weight for point in self.points]
+        started = time.perf_counter()
+        curves = bspline_segments(self.control_coords(), self.bspline_degree.get(), self.bspline_mode.get(),
+                                  None if all(weight == 1 for weight in weights) else weights)
+        self.curve_lines = self.show_curves("B-сплайн", curves, time.perf_counter() - started, "magenta",
+                                            self.curve_lines)
+
+    def redraw_bspline_segments(self, index):
+        """Перерисовка только четырех сегментов замкнутого B-сплайна, зависящих от точки index.
+
+        Сегмент s строится по точкам s, s + 1, s + 2, s + 3 по модулю их числа, поэтому
+        время перетаскивания не зависит от длины сплайна.
+        """
+        n = len(self.points)
+        affected = sorted({(index - j) % n for j in range(4)})
+        geometry = np.array([[(self.points[(s + j) % n].x, self.points[(s + j) % n].y) for j in range(4)]
+                             for s in affected], dtype=np.float64)
+        lines = self.draw_segments("B-сплайн", geometry, "magenta", [self.curve_lines[s] for s in affected])
+        for s, line in zip(affected, lines):
+            self.curve_lines[s] = line
+
+    def draw_segments(self, curve_type, geometry, color, lines=()):
+        """Вычисление сегментов выбранным способом и вывод ломаной на сегмент; возвращает id ломаных.
+
+        Ломаные из lines переносятся через coords() по порядку сегментов, недостающие
+        создаются, лишние удаляются: на сегмент приходится один вызов Tk.
+        """
+        started = time.perf_counter()
+        curves = EVALUATORS[self.evaluator](curve_type, geometry)
+        return self.show_curves(curve_type, curves, time.perf_counter() - started, color, lines)
+
+    def show_curves(self, curve_type, curves, elapsed, color, lines=()):
+        """Вывод вычисленных ломаных по одной на сегмент с переиспользованием lines; возвращает id ломаных."""
+        self.last_report = (curve_type, len(curves), sum(len(curve) - 1 for curve in curves), elapsed)
+        if not self.is_dragging:
+            self.print_report()
+        segment_lines = []
+        for index, curve in enumerate(curves):
+            flat = np.ravel(curve).tolist()
+            if index < len(lines):
+                self.canvas.coords(lines[index], *flat)
+                segment_lines.append(lines[index])
+            else:
+                segment_lines.append(self.canvas.create_line(*flat, fill=color))
+        for line in lines[len(segment_lines):]:
+            self.canvas.delete(line)
+        return segment_lines
 
 
 if __name__ == "__main__":
-    app = CurveEditor()
-    app.mainloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Графический редактор кривых")
+    parser.add_argument("--benchmark", action="store_true", help="сравнить способы вычисления кривых без окна")
+    parser.add_argument("--segments", type=int, default=50)
+    parser.add_argument("--samples", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--degrees", type=int, nargs="+", default=[3, 30, 300], help="степени кривых Безье")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark_evaluators(args.segments, args.samples)
+        benchmark_bezier(args.degrees)
+        benchmark_bspline()
+    else:
+        app = CurveEditor()
+        app.mainloop()
\ No newline at end of file
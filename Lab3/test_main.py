@@ -0,0 +1,102 @@
+import os
+import random
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+
+
+def random_points(count, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 800, size=(count, 2))
+
+
+class BSplineTest(unittest.TestCase):
+    def test_closed_cubic_matches_matrix_path(self):
+        for count in (3, 4, 7, 50):
+            points = random_points(count, count)
+            with self.subTest(count=count):
+                expected = main.evaluate_segments("B-сплайн", main.bspline_geometry(points))
+                self.assertTrue(np.allclose(main.bspline_segments(points, 3, "Замкнутый"), expected, atol=1e-6))
+
+    def test_segments_match_de_boor(self):
+        u_samples = np.linspace(0, 1, main.CURVE_SAMPLES)
+        for mode in main.BSPLINE_MODES:
+            for degree in (1, 2, 3, 5):
+                points = random_points(9, degree)
+                with self.subTest(mode=mode, degree=degree):
+                    segments = main.bspline_segments(points, degree, mode)
+                    if mode == "Замкнутый":
+                        points = points[np.arange(len(points) + degree) % len(points)]
+                    knots = main.bspline_knots(len(points), degree, mode)
+                    starts, ends = knots[degree:len(points)], knots[degree + 1:len(points) + 1]
+                    nonempty = ends > starts
+                    u = starts[nonempty, None] + u_samples * (ends - starts)[nonempty, None]
+                    expected = main.de_boor(points, knots, degree, u.ravel()).reshape(segments.shape)
+                    self.assertTrue(np.allclose(segments, expected, atol=1e-6))
+
+
+class BezierTest(unittest.TestCase):
+    def test_bernstein_matches_de_casteljau(self):
+        for degree in (1, 3, 10, 40):
+            control = random_points(degree + 1, degree)
+            with self.subTest(degree=degree):
+                t = np.linspace(0, 1, 50)
+                self.assertTrue(np.allclose(main.bezier_points(control, 50), main.de_casteljau(control, t)))
+
+    def test_elevation_and_split_keep_the_curve(self):
+        control = random_points(6, 0)
+        t = np.linspace(0, 1, 50)
+        self.assertTrue(np.allclose(main.de_casteljau(main.elevate_bezier(control), t), main.de_casteljau(control, t)))
+        left, right = main.split_bezier(control, 0.3)
+        self.assertTrue(np.allclose(main.de_casteljau(left, t), main.de_casteljau(control, 0.3 * t)))
+        self.assertTrue(np.allclose(main.de_casteljau(right, t), main.de_casteljau(control, 0.3 + 0.7 * t)))
+
+    def test_entry_order_round_trip(self):
+        points = random_points(7, 1)
+        self.assertTrue(np.array_equal(main.bezier_control(main.bezier_entry_order(points)), points))
+
+
+class SpatialHashTest(unittest.TestCase):
+    def linear_nearest(self, positions, x, y, radius):
+        best_key, best_distance = None, radius * radius
+        for key in sorted(positions):
+            px, py = positions[key]
+            distance = (px - x) ** 2 + (py - y) ** 2
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        return best_key
+
+    def test_nearest_matches_linear_scan(self):
+        generator = random.Random(0)
+        grid = main.SpatialHash(main.HIT_RADIUS)
+        positions = {}
+        for key in range(300):
+            positions[key] = (generator.randint(-50, 250), generator.randint(-50, 250))
+            grid.insert(key, *positions[key])
+        for step in range(2000):
+            action = generator.random()
+            if action < 0.2 and positions:
+                key = generator.choice(sorted(positions))
+                positions[key] = (generator.randint(-50, 250), generator.randint(-50, 250))
+                grid.move(key, *positions[key])
+            elif action < 0.25 and positions:
+                key = generator.choice(sorted(positions))
+                del positions[key]
+                grid.remove(key)
+            x, y = generator.uniform(-60, 260), generator.uniform(-60, 260)
+            radius = generator.choice((1, 5, main.HIT_RADIUS))
+            with self.subTest(step=step):
+                self.assertEqual(grid.nearest(x, y, radius), self.linear_nearest(positions, x, y, radius))
+
+    def test_radius_larger_than_cell_is_rejected(self):
+        with self.assertRaises(ValueError):
+            main.SpatialHash(10).nearest(0, 0, 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
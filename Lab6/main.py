@@ -1,13 +1,176 @@
+import math
 import tkinter as tk
 from tkinter import Menu, messagebox
 import numpy as np
 
+VIEWPORT = (0, 0, 799, 599)
+
+# Запас отсечения в пикселях: пиксели всех алгоритмов лежат ближе 2 пикселей к идеальной прямой
+CLIP_MARGIN = 2
+
+# Радиус захвата вершины полигона курсором в пикселях
+HIT_RADIUS = 6
+
+
+def clip_segments(segments, rect=VIEWPORT, margin=CLIP_MARGIN):
+    """Отсечение сразу N отрезков прямоугольником по алгоритму Лианга — Барски.
+
+    segments — массив (N, 4), rect — (xmin, ymin, xmax, ymax), расширяемый на margin.
+    Возвращает маску отрезков, задевающих прямоугольник, и параметры t0 <= t1
+    видимой части. Концы не пересчитываются, поэтому наклон отрезка не меняется.
+    """
+    seg = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    xmin, ymin, xmax, ymax = rect
+    p = np.stack((x1 - x2, x2 - x1, y1 - y2, y2 - y1))
+    q = np.stack((x1 - (xmin - margin), (xmax + margin) - x1, y1 - (ymin - margin), (ymax + margin) - y1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = q / p
+    t0 = np.max(np.where(p < 0, r, 0), axis=0)
+    t1 = np.min(np.where(p > 0, r, 1), axis=0)
+    visible = ~np.any((p == 0) & (q < 0), axis=0) & (t0 <= t1)
+    return visible, t0, t1
+
+
+def clip_steps(x1, y1, x2, y2, rect):
+    """Диапазон шагов first..last по основной оси, на которых отрезок может попасть в rect.
+
+    Шаг i соответствует параметру t = i / steps. Возвращает None, если отрезок
+    целиком снаружи; без прямоугольника возвращает весь отрезок.
+    """
+    steps = max(abs(x2 - x1), abs(y2 - y1))
+    if rect is None:
+        return 0, steps
+    visible, t0, t1 = clip_segments((x1, y1, x2, y2), rect)
+    if not visible[0]:
+        return None
+    return max(0, math.floor(t0[0] * steps)), min(steps, math.ceil(t1[0] * steps))
+
+
+def cda_batch(segments, rect=None):
+    """Пиксели сразу N отрезков по алгоритму ЦДА за один проход NumPy.
+
+    segments — массив (N, 4) из строк x1, y1, x2, y2. Возвращает массивы xs, ys
+    всех пикселей и offsets длины N + 1: пиксели отрезка i лежат в
+    xs[offsets[i]:offsets[i + 1]]. Координаты шагов вычисляются от начала отрезка
+    так же, как в LineEditor.draw_line_cda, поэтому результат совпадает попиксельно.
+    Отрезки вне rect дают пустые диапазоны.
+    """
+    seg = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    first = np.zeros(len(seg), dtype=np.int64)
+    last = steps.copy()
+    if rect is not None and len(seg):
+        visible, t0, t1 = clip_segments(seg, rect)
+        first = np.maximum(0, np.floor(t0 * steps)).astype(np.int64)
+        last = np.minimum(steps, np.ceil(t1 * steps)).astype(np.int64)
+        last[~visible] = first[~visible] - 1
+    counts = last - first + 1
+    offsets = np.zeros(len(seg) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    if offsets[-1] == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, offsets
+    div = np.maximum(steps, 1)
+    width = int(counts.max())
+    mask = np.arange(width) < counts[:, None]
+
+    step = first[:, None] + np.arange(width)
+
+    def step_rows(start, delta):
+        values = start[:, None] + step * (delta / div)[:, None]
+        return np.rint(values[mask]).astype(np.int64)
+
+    return step_rows(x1, dx), step_rows(y1, dy), offsets
+
+
+def bresenham_state(dx, dy, step):
+    """Число шагов по неосновной оси и ошибка алгоритма Брезенхема на шаге step основной оси."""
+    major, minor = max(dx, dy), min(dx, dy)
+    minor_steps = max(0, -((major - 2 * minor * step) // (2 * major))) if major else 0
+    if dx >= dy:
+        return minor_steps, dx - dy - step * dy + minor_steps * dx
+    return minor_steps, dx - dy - minor_steps * dy + step * dx
+
+
+def wu_major_range(x1, y1, x2, y2, rect):
+    """Диапазон координат основной оси, на котором пиксели алгоритма Ву могут попасть в rect."""
+    steep = abs(y2 - y1) > abs(x2 - x1)
+    start, stop = (y1, y2) if steep else (x1, x2)
+    if rect is None:
+        return min(start, stop), max(start, stop)
+    visible, t0, t1 = clip_segments((x1, y1, x2, y2), rect)
+    if not visible[0]:
+        return None
+    a = start + (stop - start) * t0[0]
+    b = start + (stop - start) * t1[0]
+    return math.floor(min(a, b)), math.ceil(max(a, b))
+
+
+class SpatialHash:
+    """Равномерная сетка для поиска точек рядом с курсором.
+
+    Ячейки размера cell_size хранят ключи точек. Поиск в радиусе не больше
+    cell_size просматривает только 3x3 соседние ячейки и сравнивает квадраты
+    расстояний, поэтому не зависит от общего числа точек.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}  # (столбец, строка) -> множество ключей
+        self.positions = {}  # ключ -> (x, y)
+
+    def cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, key, x, y):
+        self.positions[key] = (x, y)
+        self.cells.setdefault(self.cell(x, y), set()).add(key)
+
+    def remove(self, key):
+        cell = self.cell(*self.positions.pop(key))
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+
+    def move(self, key, x, y):
+        if self.cell(*self.positions[key]) == self.cell(x, y):
+            self.positions[key] = (x, y)
+        else:
+            self.remove(key)
+            self.insert(key, x, y)
+
+    def nearest(self, x, y, radius):
+        """Ключ ближайшей точки на расстоянии меньше radius (при равенстве — меньший ключ) или None."""
+        if radius > self.cell_size:
+            raise ValueError("Радиус поиска больше размера ячейки")
+        col, row = self.cell(x, y)
+        best_key, best_distance = None, radius * radius
+        for dc in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                for key in self.cells.get((col + dc, row + dr), ()):
+                    px, py = self.positions[key]
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance < best_distance or (distance == best_distance
+                                                    and best_key is not None and key < best_key):
+                        best_key, best_distance = key, distance
+        return best_key
+
+    def clear(self):
+        self.cells.clear()
+        self.positions.clear()
+
 
 class LineEditor:
     def __init__(self, canvas):
         self.canvas = canvas
         self.lines = []
         self.drawing_mode = "CDA"
+        self.clip_rect = VIEWPORT
 
     def set_cda_mode(self):
         self.drawing_mode = "CDA"
@@ -22,27 +185,59 @@ class LineEditor:
         print("Выбран алгоритм Ву")
 
     def draw_line_cda(self, x1, y1, x2, y2, color="black"):
+        span = clip_steps(x1, y1, x2, y2, self.clip_rect)
+        if span is None:
+            return
+        first, last = span
         dx = x2 - x1
         dy = y2 - y1
-        steps = max(abs(dx), abs(dy))
+        steps = max(abs(dx), abs(dy), 1)
         x_inc = dx / steps
         y_inc = dy / steps
-        x, y = x1, y1
-        for _ in range(steps + 1):
-            self.canvas.create_line(round(x), round(y), round(x) + 1, round(y) + 1, fill=color)
-            x += x_inc
-            y += y_inc
+        # Координаты шага считаются от начала отрезка, поэтому невидимые шаги не проходятся
+        for step in range(first, last + 1):
+            x, y = round(x1 + step * x_inc), round(y1 + step * y_inc)
+            self.canvas.create_line(x, y, x + 1, y + 1, fill=color)
+
+    def draw_lines_cda(self, segments, color="black"):
+        xs, ys, _ = cda_batch(segments, self.clip_rect)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.canvas.create_line(x, y, x + 1, y + 1, fill=color)
+
+    def redraw_lines(self, color="black"):
+        # Подряд идущие отрезки ЦДА выводятся одним вызовом cda_batch
+        cda_run = []
+        for line, mode in self.lines:
+            if mode == "CDA":
+                cda_run.append(line)
+                continue
+            if cda_run:
+                self.draw_lines_cda(cda_run, color)
+                cda_run = []
+            x1, y1, x2, y2 = line
+            if mode == "Bresenham":
+                self.draw_line_bresenham(x1, y1, x2, y2, color)
+            elif mode == "Wu":
+                self.draw_line_wu(x1, y1, x2, y2, color)
+        if cda_run:
+            self.draw_lines_cda(cda_run, color)
 
     def draw_line_bresenham(self, x1, y1, x2, y2, color="black"):
+        span = clip_steps(x1, y1, x2, y2, self.clip_rect)
+        if span is None:
+            return
+        first, last = span
         dx = abs(x2 - x1)
         dy = abs(y2 - y1)
         sx = 1 if x1 < x2 else -1
         sy = 1 if y1 < y2 else -1
-        err = dx - dy
-        while True:
+        minor_steps, err = bresenham_state(dx, dy, first)
+        if dx >= dy:
+            x1, y1 = x1 + sx * first, y1 + sy * minor_steps
+        else:
+            x1, y1 = x1 + sx * minor_steps, y1 + sy * first
+        for _ in range(last - first + 1):
             self.canvas.create_line(x1, y1, x1 + 1, y1 + 1, fill=color)
-            if x1 == x2 and y1 == y2:
-                break
             e2 = 2 * err
             if e2 > -dy:
                 err -= dy
@@ -52,6 +247,11 @@ class LineEditor:
                 y1 += sy
 
     def draw_line_wu(self, x1, y1, x2, y2, color="black"):
+        major_range = wu_major_range(x1, y1, x2, y2, self.clip_rect)
+        if major_range is None:
+            return
+        lo, hi = major_range
+
         def plot(x, y, c):
             self.canvas.create_line(x, y, x + 1, y + 1, fill=self._color_from_intensity(c))
 
@@ -79,32 +279,36 @@ class LineEditor:
         x_gap = rfpart(x1 + 0.5)
         xpxl1 = x_end
         ypxl1 = int(y_end)
-        if steep:
-            plot(ypxl1, xpxl1, rfpart(y_end) * x_gap)
-            plot(ypxl1 + 1, xpxl1, fpart(y_end) * x_gap)
-        else:
-            plot(xpxl1, ypxl1, rfpart(y_end) * x_gap)
-            plot(xpxl1, ypxl1 + 1, fpart(y_end) * x_gap)
-        intery = y_end + gradient
+        if lo <= xpxl1 <= hi:
+            if steep:
+                plot(ypxl1, xpxl1, rfpart(y_end) * x_gap)
+                plot(ypxl1 + 1, xpxl1, fpart(y_end) * x_gap)
+            else:
+                plot(xpxl1, ypxl1, rfpart(y_end) * x_gap)
+                plot(xpxl1, ypxl1 + 1, fpart(y_end) * x_gap)
+        first = max(xpxl1 + 1, lo)
+        y_start = y_end
         x_end = round(x2)
         y_end = y2 + gradient * (x_end - x2)
         x_gap = fpart(x2 + 0.5)
         xpxl2 = x_end
         ypxl2 = int(y_end)
-        if steep:
-            plot(ypxl2, xpxl2, rfpart(y_end) * x_gap)
-            plot(ypxl2 + 1, xpxl2, fpart(y_end) * x_gap)
-        else:
-            plot(xpxl2, ypxl2, rfpart(y_end) * x_gap)
-            plot(xpxl2, ypxl2 + 1, fpart(y_end) * x_gap)
-        for x in range(xpxl1 + 1, xpxl2):
+        if lo <= xpxl2 <= hi:
+            if steep:
+                plot(ypxl2, xpxl2, rfpart(y_end) * x_gap)
+                plot(ypxl2 + 1, xpxl2, fpart(y_end) * x_gap)
+            else:
+                plot(xpxl2, ypxl2, rfpart(y_end) * x_gap)
+                plot(xpxl2, ypxl2 + 1, fpart(y_end) * x_gap)
+        for x in range(first, min(xpxl2, hi + 1)):
+            # Пересечение считается от первого конца, поэтому невидимые столбцы не проходятся
+            intery = y_start + gradient * (x - xpxl1)
             if steep:
                 plot(int(intery), x, rfpart(intery))
                 plot(int(intery) + 1, x, fpart(intery))
             else:
                 plot(x, int(intery), rfpart(intery))
                 plot(x, int(intery) + 1, fpart(intery))
-            intery += gradient
 
     def _color_from_intensity(self, intensity):
         grayscale = int(255 * intensity)
@@ -122,6 +326,7 @@ class PolygonEditor(LineEditor):
         super().__init__(self.canvas)
 
         self.points = []
+        self.vertex_index = SpatialHash(HIT_RADIUS)  # Индексы вершин в сетке для поиска под курсором
         self.polygon = None
         self.normals = []
         self.intersect_point = None
@@ -135,6 +340,7 @@ class PolygonEditor(LineEditor):
         self.create_toolbar()
         self.canvas.bind("<Button-1>", self.add_point)
         self.canvas.bind("<Button-3>", self.delete_point)
+        self.canvas.bind("<Shift-Button-3>", self.delete_vertex_at)
 
     def create_menu(self):
         menu = Menu(self.root)
@@ -869,29 +1075,43 @@ class PolygonEditor(LineEditor):
     def add_point(self, event):
         x, y = event.x, event.y
         self.points.append((x, y))
+        self.vertex_index.insert(len(self.points) - 1, x, y)
         self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill="black")
         if len(self.points) > 1:
             self.canvas.create_line(self.points[-2], self.points[-1], fill="black")
 
+    def find_vertex_near(self, x, y, threshold=HIT_RADIUS):
+        # Индекс ближайшей вершины ближе threshold или None
+        return self.vertex_index.nearest(x, y, threshold)
+
     def delete_point(self, event):
         if self.points:
-            self.points.pop()
-            self.canvas.delete("all")
-            if self.debug_mode:
-                self.draw_grid()
-            for i in range(len(self.points) - 1):
-                self.canvas.create_line(self.points[i], self.points[i + 1], fill="black")
-            if len(self.points) > 0:
-                self.canvas.create_oval(self.points[-1][0] - 2, self.points[-1][1] - 2, self.points[-1][0] + 2,
-                                        self.points[-1][1] + 2, fill="black")
-            for line, mode in self.lines:
-                x1, y1, x2, y2 = line
-                if mode == "CDA":
-                    self.draw_line_cda(x1, y1, x2, y2)
-                elif mode == "Bresenham":
-                    self.draw_line_bresenham(x1, y1, x2, y2)
-                elif mode == "Wu":
-                    self.draw_line_wu(x1, y1, x2, y2)
+            self.remove_vertex(len(self.points) - 1)
+
+    def delete_vertex_at(self, event):
+        # Shift + правая кнопка удаляет вершину под курсором
+        index = self.find_vertex_near(event.x, event.y)
+        if index is not None:
+            self.remove_vertex(index)
+
+    def remove_vertex(self, index):
+        self.points.pop(index)
+        if index == len(self.points):
+            self.vertex_index.remove(index)
+        else:
+            # Индексы следующих вершин сдвинулись, сетка заполняется заново
+            self.vertex_index.clear()
+            for i, (px, py) in enumerate(self.points):
+                self.vertex_index.insert(i, px, py)
+        self.canvas.delete("all")
+        if self.debug_mode:
+            self.draw_grid()
+        for i in range(len(self.points) - 1):
+            self.canvas.create_line(self.points[i], self.points[i + 1], fill="black")
+        if len(self.points) > 0:
+            self.canvas.create_oval(self.points[-1][0] - 2, self.points[-1][1] - 2, self.points[-1][0] + 2,
+                                    self.points[-1][1] + 2, fill="black")
+        self.redraw_lines("blue")
 
     def get_internal_normals(self):
         if len(self.points) < 3:
@@ -1090,6 +1310,8 @@ class PolygonEditor(LineEditor):
                 self.draw_line_bresenham(x1, y1, x2, y2, "blue")
             elif self.drawing_mode == "Wu":
                 self.draw_line_wu(x1, y1, x2, y2, "blue")
+            # Растр отрезка остается на полотне, поэтому он восстанавливается при перерисовке полигона
+            self.lines.append(((x1, y1, x2, y2), self.drawing_mode))
 
             self.canvas.unbind("<Button-1>")
             self.canvas.bind("<Button-1>", self.add_point)
@@ -1136,6 +1358,8 @@ class PolygonEditor(LineEditor):
     def clear_canvas(self):
         self.canvas.delete("all")
         self.points.clear()
+        self.vertex_index.clear()
+        self.lines.clear()
         self.polygon = None
         self.normals = []
         self.intersect_point = None